@@ -1,8 +1,13 @@
-from flask import Blueprint, Response, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 
 from models.api_response_model import APIResponse
+from models.chroma_model import RetrievalCacheStats
 from models.query_model import QueryResponse
+from models.trace_model import TraceStats
 from services.query_service import query_service
+from services.retrieval_service import retrieval_service
+from services.trace_service import trace_service
+from utils.contants import DEFAULT_PROJECT
 
 query_bp = Blueprint("query", __name__, url_prefix="/api/query")
 
@@ -20,10 +25,17 @@ def ask_question() -> tuple[Response, int]:
         return jsonify(response.to_dict()), 400
 
     question = data.get("question", "").strip()
+    project = data.get("project") or DEFAULT_PROJECT
+    debug = bool(data.get("debug"))
 
     try:
-        answer_html: str = query_service.ask_agent(question)
-        result = QueryResponse(question=question, answer_html=answer_html)
+        answer_html, trace = query_service.ask_agent(question, project)
+        result = QueryResponse(
+            question=question,
+            answer_html=answer_html,
+            project=project,
+            debug=trace if debug else None,
+        )
 
         response: APIResponse[QueryResponse] = APIResponse.ok(
             message="Success!", data=result
@@ -38,3 +50,56 @@ def ask_question() -> tuple[Response, int]:
             details=str(e),
         )
         return jsonify(response.to_dict()), 500
+
+
+@query_bp.route("/stream", methods=["POST"])
+def stream_question() -> tuple[Response, int]:
+    data = request.get_json(silent=True)
+
+    if not data or not data.get("question"):
+        response: APIResponse[None] = APIResponse.fail(
+            message="Query failed",
+            error="Empty query",
+            details="Question cannot be empty",
+        )
+        return jsonify(response.to_dict()), 400
+
+    question = data.get("question", "").strip()
+    project = data.get("project") or DEFAULT_PROJECT
+    debug = bool(data.get("debug"))
+
+    def generate():
+        for event in query_service.stream_agent(question, project, debug):
+            yield event.to_sse()
+
+    return (
+        Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        ),
+        200,
+    )
+
+
+@query_bp.route("/cache", methods=["GET"])
+def get_cache_stats() -> tuple[Response, int]:
+    stats = retrieval_service.get_cache_stats()
+    response: APIResponse[RetrievalCacheStats] = APIResponse.ok(
+        message="Success!", data=stats
+    )
+    return jsonify(response.to_dict()), 200
+
+
+@query_bp.route("/stats", methods=["GET"])
+def get_trace_stats() -> tuple[Response, int]:
+    stats = trace_service.get_stats()
+    response: APIResponse[TraceStats] = APIResponse.ok(message="Success!", data=stats)
+    return jsonify(response.to_dict()), 200
+
+
+@query_bp.route("/stats", methods=["DELETE"])
+def reset_trace_stats() -> tuple[Response, int]:
+    trace_service.reset()
+    response: APIResponse[None] = APIResponse.ok(message="Stats reset")
+    return jsonify(response.to_dict()), 200
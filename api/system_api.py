@@ -0,0 +1,16 @@
+from flask import Blueprint, Response, jsonify
+
+from models.api_response_model import APIResponse
+from models.startup_model import StartupReport
+from services.startup_service import startup_service
+
+system_bp = Blueprint("system", __name__, url_prefix="/api/system")
+
+
+@system_bp.route("/startup", methods=["GET"])
+def get_startup_report() -> tuple[Response, int]:
+    report = startup_service.get_report()
+    response: APIResponse[StartupReport] = APIResponse.ok(
+        message="Success!", data=report
+    )
+    return jsonify(response.to_dict()), 200
@@ -1,11 +1,41 @@
+import os
+
 from flask import Blueprint, Response, request, jsonify
 
 from models.api_response_model import APIResponse
+from models.job_model import UploadJob
 from models.upload_model import UploadResponse
+from services.upload_job_service import JobQueueFullError, upload_job_service
 from services.upload_service import upload_service
+from services.upload_source import ArchiveError, GitSourceError
+from utils.contants import DEFAULT_PROJECT, GIT_REPOSITORY_ROOTS
 
 upload_bp = Blueprint("upload", __name__, url_prefix="/api/upload")
 
+# Raw archive bodies are identified by their content type when no filename is
+# given; the exact tar compression is detected while reading.
+ARCHIVE_CONTENT_TYPES = {
+    "application/zip": ".zip",
+    "application/x-zip-compressed": ".zip",
+    "application/gzip": ".tar.gz",
+    "application/x-gzip": ".tar.gz",
+    "application/x-gtar": ".tar.gz",
+    "application/x-tar": ".tar",
+    "application/x-bzip2": ".tar.bz2",
+    "application/x-xz": ".tar.xz",
+}
+
+
+def is_enabled(value: str | None) -> bool:
+    return (value or "").lower() in ("1", "true")
+
+
+def is_allowed_repository(path: str) -> bool:
+    real_path = os.path.realpath(path)
+    return any(
+        os.path.commonpath([root, real_path]) == root for root in GIT_REPOSITORY_ROOTS
+    )
+
 
 @upload_bp.route("/folder", methods=["POST"])
 def upload_folder() -> tuple[Response, int]:
@@ -26,12 +56,194 @@ def upload_folder() -> tuple[Response, int]:
         )
         return jsonify(response.to_dict()), 400
 
-    folder_name = request.form.get("folder_name", "uploaded_folder")
+    folder_name = request.form.get("folder_name") or DEFAULT_PROJECT
+    full_reindex = is_enabled(request.form.get("full_reindex"))
+    run_async = is_enabled(request.form.get("async"))
+
+    if run_async:
+        try:
+            job = upload_job_service.submit(files, folder_name, full_reindex)
+        except JobQueueFullError as e:
+            response: APIResponse[None] = APIResponse.fail(
+                message="Upload rejected",
+                error="Upload queue full",
+                details=str(e),
+            )
+            return jsonify(response.to_dict()), 429
+
+        response: APIResponse[UploadJob] = APIResponse.ok(
+            message="Upload queued", data=job
+        )
+        return jsonify(response.to_dict()), 202
 
-    result = upload_service.upload_folder(files, folder_name)
+    result = upload_service.upload_folder(files, folder_name, full_reindex)
 
     status_code = 200 if result.status.value == "success" else 207
     response: APIResponse[UploadResponse] = APIResponse.ok(
         message=result.message, data=result
     )
     return jsonify(response.to_dict()), status_code
+
+
+@upload_bp.route("/archive", methods=["POST"])
+def upload_archive() -> tuple[Response, int]:
+    """Index a zip or tar(.gz) archive, sent either as the multipart field
+    ``archive`` or as the raw request body (options then go in the query
+    string). Members are read one at a time, never all at once."""
+    if "archive" in request.files:
+        archive = request.files["archive"]
+        stream, filename = archive.stream, archive.filename or ""
+        options = request.form
+    elif request.mimetype in ARCHIVE_CONTENT_TYPES or request.args.get("filename"):
+        stream = request.stream
+        filename = request.args.get("filename") or ARCHIVE_CONTENT_TYPES.get(
+            request.mimetype, ""
+        )
+        options = request.args
+    else:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Upload failed",
+            error="No archive provided",
+            details="Send a zip or tar.gz archive as the 'archive' field or as the "
+            "request body with an archive content type",
+        )
+        return jsonify(response.to_dict()), 400
+
+    folder_name = options.get("folder_name") or DEFAULT_PROJECT
+    full_reindex = is_enabled(options.get("full_reindex"))
+
+    try:
+        if is_enabled(options.get("async")):
+            job = upload_job_service.submit_archive(
+                stream, filename, folder_name, full_reindex
+            )
+            response: APIResponse[UploadJob] = APIResponse.ok(
+                message="Upload queued", data=job
+            )
+            return jsonify(response.to_dict()), 202
+
+        result = upload_service.upload_archive(
+            stream, filename, folder_name, full_reindex
+        )
+
+    except ArchiveError as e:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Upload failed", error="Invalid archive", details=str(e)
+        )
+        return jsonify(response.to_dict()), 400
+
+    except JobQueueFullError as e:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Upload rejected",
+            error="Upload queue full",
+            details=str(e),
+        )
+        return jsonify(response.to_dict()), 429
+
+    status_code = 200 if result.status.value == "success" else 207
+    response: APIResponse[UploadResponse] = APIResponse.ok(
+        message=result.message, data=result
+    )
+    return jsonify(response.to_dict()), status_code
+
+
+@upload_bp.route("/git", methods=["POST"])
+def sync_git() -> tuple[Response, int]:
+    """Index a git repository that is already on this machine, e.g. a CI
+    checkout. Only files changed since the last synced commit are re-chunked."""
+    data = request.get_json(silent=True) or {}
+    repository_path = data.get("path")
+
+    if not repository_path:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Sync failed",
+            error="No repository provided",
+            details="Request must include 'path', a local git working tree or "
+            "bare repository",
+        )
+        return jsonify(response.to_dict()), 400
+
+    if not is_allowed_repository(repository_path):
+        response: APIResponse[None] = APIResponse.fail(
+            message="Sync rejected",
+            error="Repository not allowed",
+            details="The path is not under a directory listed in GIT_REPOSITORY_ROOTS",
+        )
+        return jsonify(response.to_dict()), 403
+
+    folder_name = data.get("folder_name") or DEFAULT_PROJECT
+    ref = data.get("ref") or "HEAD"
+    full_reindex = bool(data.get("full_reindex"))
+
+    try:
+        if data.get("async"):
+            job = upload_job_service.submit_git(
+                repository_path, folder_name, ref, full_reindex
+            )
+            response: APIResponse[UploadJob] = APIResponse.ok(
+                message="Sync queued", data=job
+            )
+            return jsonify(response.to_dict()), 202
+
+        result = upload_service.sync_git(
+            repository_path, folder_name, ref, full_reindex
+        )
+
+    except GitSourceError as e:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Sync failed", error="Invalid repository", details=str(e)
+        )
+        return jsonify(response.to_dict()), 400
+
+    except JobQueueFullError as e:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Sync rejected",
+            error="Upload queue full",
+            details=str(e),
+        )
+        return jsonify(response.to_dict()), 429
+
+    status_code = 200 if result.status.value == "success" else 207
+    response: APIResponse[UploadResponse] = APIResponse.ok(
+        message=result.message, data=result
+    )
+    return jsonify(response.to_dict()), status_code
+
+
+@upload_bp.route("/jobs", methods=["GET"])
+def list_upload_jobs() -> tuple[Response, int]:
+    jobs = [job.to_dict() for job in upload_job_service.list_jobs()]
+    response: APIResponse[list] = APIResponse.ok(message="Success!", data=jobs)
+    return jsonify(response.to_dict()), 200
+
+
+@upload_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_upload_job(job_id: str) -> tuple[Response, int]:
+    job = upload_job_service.get(job_id)
+    if job is None:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Job not found",
+            error="Unknown job",
+            details=f"No upload job with id '{job_id}'",
+        )
+        return jsonify(response.to_dict()), 404
+
+    response: APIResponse[UploadJob] = APIResponse.ok(message="Success!", data=job)
+    return jsonify(response.to_dict()), 200
+
+
+@upload_bp.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_upload_job(job_id: str) -> tuple[Response, int]:
+    job = upload_job_service.cancel(job_id)
+    if job is None:
+        response: APIResponse[None] = APIResponse.fail(
+            message="Job not found",
+            error="Unknown job",
+            details=f"No upload job with id '{job_id}'",
+        )
+        return jsonify(response.to_dict()), 404
+
+    response: APIResponse[UploadJob] = APIResponse.ok(
+        message="Cancellation requested", data=job
+    )
+    return jsonify(response.to_dict()), 202
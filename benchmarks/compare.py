@@ -0,0 +1,79 @@
+"""Compare two benchmark reports.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Prints every metric the reports share with its relative change, and exits
+with status 1 when a throughput drops or a latency, duration or memory figure
+grows by more than the threshold (in percent).
+"""
+
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "_seconds", "seconds", "_mb")
+
+
+def flatten(report: dict, prefix: str = "") -> dict[str, float]:
+    metrics = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = float(value)
+    return metrics
+
+
+def get_direction(metric: str) -> int:
+    """1 when a larger value is better, -1 when smaller is, 0 for counts."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[str], int]:
+    old, new = flatten(baseline), flatten(current)
+    lines, regressions = [], 0
+
+    for metric in sorted(old.keys() & new.keys()):
+        if metric.startswith(("version", "config.", "environment.")):
+            continue
+        before, after = old[metric], new[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        direction = get_direction(metric)
+
+        flag = ""
+        if direction and -direction * change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        lines.append(
+            f"{metric:60} {before:>14.3f} {after:>14.3f} {change:>+8.1f}%{flag}"
+        )
+
+    return lines, regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    print(f"\n{regressions} regression(s) above {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import hashlib
+import re
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic bag-of-tokens embedding for benchmarks.
+
+    Each token is hashed into one of ``dimension`` signed buckets and the vector
+    is L2-normalized. It needs no model download and gives the same vectors on
+    every run, so timings measure this project rather than the embedder.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = []
+        for text in input:
+            vector = np.zeros(self.dimension, dtype=np.float32)
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest, "little")
+                vector[bucket % self.dimension] += 1.0 if bucket >> 63 else -1.0
+
+            norm = np.linalg.norm(vector)
+            embeddings.append(vector / norm if norm else vector)
+        return embeddings
+
+    @staticmethod
+    def name() -> str:
+        return "benchmark-hash"
+
+    def get_config(self) -> dict[str, Any]:
+        return {"dimension": self.dimension}
+
+    @staticmethod
+    def build_from_config(config: dict[str, Any]) -> "HashEmbeddingFunction":
+        return HashEmbeddingFunction(config.get("dimension", 384))
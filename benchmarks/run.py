@@ -0,0 +1,285 @@
+"""Ingestion and retrieval benchmarks over a synthetic repository.
+
+    python -m benchmarks.run --files 500 --output results.json
+
+Chunking, a full upload and vector queries are timed against a throwaway index
+in a temporary directory, using a deterministic hash embedding so that results
+depend only on this project's code. The report is JSON; compare two reports
+with ``python -m benchmarks.compare``.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_VERSION = 1
+PROJECT = "benchmark"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=200, help="regular files")
+    parser.add_argument(
+        "--languages",
+        default="",
+        help="language weights, e.g. python=3,go=1 (default: every language)",
+    )
+    parser.add_argument(
+        "--scale", type=int, default=1, help="size multiplier for pathological files"
+    )
+    parser.add_argument("--no-pathological", action="store_true")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--results", type=int, default=5, help="n_results per query")
+    parser.add_argument("--workers", type=int, help="CHUNK_WORKERS for the upload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the index here instead of a temp dir")
+    parser.add_argument("--output", help="write the JSON report here, not stdout")
+    return parser.parse_args(argv)
+
+
+def parse_language_mix(value: str) -> dict[str, float] | None:
+    if not value:
+        return None
+    mix = {}
+    for part in value.split(","):
+        language, _, weight = part.partition("=")
+        mix[language.strip()] = float(weight or 1)
+    return mix
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process. Chunk workers are separate
+    processes, and on Linux their ru_maxrss starts from the parent's, so they
+    are not reported."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds else 0.0
+
+
+def summarize_files(files) -> dict:
+    languages: dict[str, int] = {}
+    for file in files:
+        languages[file.language] = languages.get(file.language, 0) + 1
+    return {
+        "files": len(files),
+        "bytes": sum(len(file.content.encode("utf-8")) for file in files),
+        "lines": sum(file.content.count("\n") + 1 for file in files),
+        "languages": dict(sorted(languages.items())),
+    }
+
+
+def bench_chunking(files) -> dict:
+    from models.graph_model import FileEdges
+    from services.code_chunk_service import code_chunk_service
+
+    # Grammars and queries are compiled on first use; keep that out of the timings.
+    for file in {file.language: file for file in files}.values():
+        code_chunk_service.chunk_code(file.content[:2000], file.path)
+
+    groups: dict[str, dict] = {}
+    for file in files:
+        started = time.perf_counter()
+        chunks = code_chunk_service.chunk_code(
+            file.content, file.path, FileEdges(file.path)
+        )
+        elapsed = time.perf_counter() - started
+
+        key = file.language if file.case == "regular" else file.case
+        group = groups.setdefault(
+            key, {"files": 0, "bytes": 0, "chunks": 0, "seconds": 0.0, "max_ms": 0.0}
+        )
+        group["files"] += 1
+        group["bytes"] += len(file.content.encode("utf-8"))
+        group["chunks"] += len(chunks)
+        group["seconds"] += elapsed
+        group["max_ms"] = max(group["max_ms"], round(elapsed * 1000, 2))
+
+    total = {"files": 0, "bytes": 0, "chunks": 0, "seconds": 0.0}
+    for group in groups.values():
+        for field in total:
+            total[field] += group[field]
+    for group in [*groups.values(), total]:
+        group["files_per_sec"] = rate(group["files"], group["seconds"])
+        group["chunks_per_sec"] = rate(group["chunks"], group["seconds"])
+        group["mb_per_sec"] = rate(group["bytes"] / 1e6, group["seconds"])
+        group["seconds"] = round(group["seconds"], 4)
+
+    return {**total, "groups": dict(sorted(groups.items()))}
+
+
+def bench_upload(files) -> dict:
+    from werkzeug.datastructures import FileStorage
+
+    from services.parallel_chunk_service import parallel_chunk_service
+    from services.upload_service import upload_service
+
+    def to_uploads():
+        return [
+            FileStorage(
+                stream=io.BytesIO(file.content.encode("utf-8")), filename=file.path
+            )
+            for file in files
+        ]
+
+    started = time.perf_counter()
+    response = upload_service.upload_folder(to_uploads(), PROJECT)
+    elapsed = time.perf_counter() - started
+
+    # An unchanged re-upload only hashes files against the manifest.
+    started = time.perf_counter()
+    upload_service.upload_folder(to_uploads(), PROJECT)
+    unchanged = time.perf_counter() - started
+
+    return {
+        "status": response.status.value,
+        "files": len(response.uploaded_files),
+        "failed_files": len(response.failed_files),
+        "chunks": response.total_chunks,
+        "batches": len(response.batches),
+        "workers": parallel_chunk_service.workers,
+        "seconds": round(elapsed, 4),
+        "files_per_sec": rate(len(response.uploaded_files), elapsed),
+        "chunks_per_sec": rate(response.total_chunks, elapsed),
+        "unchanged_seconds": round(unchanged, 4),
+    }
+
+
+def bench_query(queries: int, n_results: int, seed: int) -> dict:
+    import random
+
+    from benchmarks.synthetic_repo import NOUNS, VERBS
+    from repositories.chroma_repository import chroma_repository
+    from services.trace_service import trace_service
+
+    rng = random.Random(seed)
+    texts = [
+        rng.choice(
+            [
+                f"how does {rng.choice(VERBS)} {rng.choice(NOUNS)} work",
+                f"{rng.choice(VERBS)}_{rng.choice(NOUNS)}",
+                f"{rng.choice(NOUNS)} service {rng.choice(VERBS)}",
+            ]
+        )
+        for _ in range(queries)
+    ]
+
+    for text in texts[:5]:
+        chroma_repository.query(text, n_results, PROJECT)
+
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        query_started = time.perf_counter()
+        chroma_repository.query(text, n_results, PROJECT)
+        latencies.append((time.perf_counter() - query_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "queries": queries,
+        "n_results": n_results,
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(trace_service.percentile(ordered, 0.5), 3),
+        "p90_ms": round(trace_service.percentile(ordered, 0.9), 3),
+        "p99_ms": round(trace_service.percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+        "queries_per_sec": rate(queries, elapsed),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    from benchmarks.hash_embedding import HashEmbeddingFunction
+    from benchmarks.synthetic_repo import SyntheticRepoGenerator
+    from repositories.chroma_repository import chroma_repository
+
+    embedding_function = HashEmbeddingFunction()
+    chroma_repository.set_embedding_function(
+        embedding_function,
+        f"{embedding_function.name()}-{embedding_function.dimension}",
+    )
+
+    files = SyntheticRepoGenerator(args.seed).generate(
+        args.files,
+        parse_language_mix(args.languages),
+        pathological=not args.no_pathological,
+        scale=args.scale,
+    )
+
+    chunking = bench_chunking(files)
+    rss_after_chunking = peak_rss_mb()
+    upload = bench_upload(files)
+    rss_after_upload = peak_rss_mb()
+    query = bench_query(args.queries, args.results, args.seed)
+
+    return {
+        "version": REPORT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            "files": args.files,
+            "languages": parse_language_mix(args.languages) or "all",
+            "pathological": not args.no_pathological,
+            "scale": args.scale,
+            "queries": args.queries,
+            "seed": args.seed,
+        },
+        "repository": summarize_files(files),
+        "chunking": chunking,
+        "upload": upload,
+        "query": query,
+        "memory": {
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_after_chunking_mb": rss_after_chunking,
+            "peak_rss_after_upload_mb": rss_after_upload,
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="codebase-benchmark-")
+
+    # The repositories keep their data under ./chroma_db and read their settings
+    # on import, so switch directory and configure before importing them.
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    if args.workers:
+        os.environ["CHUNK_WORKERS"] = str(args.workers)
+
+    try:
+        report = run(args)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Deterministic synthetic repositories for the benchmarks.
+
+Every language in ``EXTENSION_TO_LANGUAGE`` has a template that produces files
+with imports, classes, methods, free functions and calls between them, so
+chunking, symbol extraction and the code graph all have real work to do. A few
+pathological files can be added on top: one huge file, one file with thousands
+of one-line functions and one minified JavaScript bundle.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from services.code_chunk_service import EXTENSION_TO_LANGUAGE
+
+VERBS = [
+    "load",
+    "parse",
+    "build",
+    "render",
+    "fetch",
+    "merge",
+    "index",
+    "resolve",
+    "validate",
+    "encode",
+    "flush",
+    "schedule",
+]
+NOUNS = [
+    "user",
+    "order",
+    "token",
+    "session",
+    "report",
+    "cache",
+    "invoice",
+    "graph",
+    "payload",
+    "config",
+    "stream",
+    "batch",
+]
+
+LANGUAGE_EXTENSIONS = {
+    "python": ".py",
+    "javascript": ".js",
+    "typescript": ".ts",
+    "tsx": ".tsx",
+    "java": ".java",
+    "go": ".go",
+    "rust": ".rs",
+    "c": ".c",
+    "cpp": ".cpp",
+}
+
+PATHOLOGICAL_CASES = ("huge_file", "tiny_functions", "minified_js")
+
+
+@dataclass(slots=True)
+class SyntheticFile:
+    path: str
+    content: str
+    language: str
+    # "regular" or one of PATHOLOGICAL_CASES.
+    case: str = "regular"
+
+
+@dataclass(slots=True)
+class FileSpec:
+    module: str
+    classes: list[tuple[str, list[str]]]
+    functions: list[str]
+    imports: list[str]
+    calls: list[str]
+    body_lines: int
+
+
+def snake(words: list[str]) -> str:
+    return "_".join(words)
+
+
+def camel(words: list[str]) -> str:
+    return words[0] + "".join(word.title() for word in words[1:])
+
+
+def pascal(words: list[str]) -> str:
+    return "".join(word.title() for word in words)
+
+
+def render_python(spec: FileSpec) -> str:
+    lines = [f"from {module.replace('/', '.')} import *" for module in spec.imports]
+    lines += ["import os", "", f"DEFAULT_LIMIT = {len(spec.functions) * 10}", ""]
+    for class_name, methods in spec.classes:
+        lines += ["", f"class {class_name}:", "    def __init__(self, limit):"]
+        lines += ["        self.limit = limit", ""]
+        for method in methods:
+            lines += [f"    def {method}(self, value):", "        total = 0"]
+            lines += ["        for item in range(self.limit):"]
+            lines += [
+                f"            total += item * value + {i}"
+                for i in range(spec.body_lines)
+            ]
+            lines += [f"        return {spec.calls[0]}(total)", ""]
+    for function in spec.functions:
+        lines += ["", f"def {function}(value):", "    result = []"]
+        lines += [f"    result.append(value + {i})" for i in range(spec.body_lines)]
+        lines += [f"    return {spec.calls[-1]}(len(result))", ""]
+    return "\n".join(lines)
+
+
+def render_javascript(spec: FileSpec, typed: bool = False, jsx: bool = False) -> str:
+    arg = "value: number" if typed else "value"
+    lines = [f"import {{ helper }} from './{module}';" for module in spec.imports]
+    lines += [f"const DEFAULT_LIMIT = {len(spec.functions) * 10};", ""]
+    for class_name, methods in spec.classes:
+        lines += [f"export class {class_name} {{", "  constructor(limit) {"]
+        lines += ["    this.limit = limit;", "  }", ""]
+        for method in methods:
+            lines += [f"  {method}({arg}) {{", "    let total = 0;"]
+            lines += [f"    total += value * {i};" for i in range(spec.body_lines)]
+            lines += [f"    return {spec.calls[0]}(total);", "  }", ""]
+        lines += ["}", ""]
+    for function in spec.functions:
+        lines += [f"export function {function}({arg}) {{", "  const result = [];"]
+        lines += [f"  result.push(value + {i});" for i in range(spec.body_lines)]
+        if jsx:
+            lines += ['  return <div className="item">{result.length}</div>;', "}", ""]
+        else:
+            lines += [f"  return {spec.calls[-1]}(result.length);", "}", ""]
+    return "\n".join(lines)
+
+
+def render_java(spec: FileSpec) -> str:
+    lines = [f"package {spec.module.rsplit('/', 1)[0].replace('/', '.')};", ""]
+    lines += [f"import {module.replace('/', '.')};" for module in spec.imports]
+    lines += ["import java.util.List;", ""]
+    # Java has no free functions: they become static methods of the first class.
+    classes = spec.classes or [(pascal(spec.module.rsplit("/", 1)[-1].split("_")), [])]
+    for index, (class_name, methods) in enumerate(classes):
+        lines += [f"public class {class_name} {{", "    private int limit;", ""]
+        for method in methods:
+            lines += [
+                f"    public int {method}(int value) {{",
+                "        int total = 0;",
+            ]
+            lines += [f"        total += value * {i};" for i in range(spec.body_lines)]
+            lines += [f"        return {spec.calls[0]}(total);", "    }", ""]
+        for function in spec.functions if index == 0 else []:
+            lines += [f"    public static int {function}(int value) {{"]
+            lines += [f"        value += {i};" for i in range(spec.body_lines)]
+            lines += [f"        return {spec.calls[-1]}(value);", "    }", ""]
+        lines += ["}", ""]
+    return "\n".join(lines)
+
+
+def render_go(spec: FileSpec) -> str:
+    lines = [f"package {spec.module.rsplit('/', 2)[-2]}", "", "import ("]
+    lines += ['\t"fmt"'] + [f'\t"example.com/{module}"' for module in spec.imports]
+    lines += [")", ""]
+    for class_name, methods in spec.classes:
+        lines += [f"type {class_name} struct {{", "\tLimit int", "}", ""]
+        for method in methods:
+            lines += [
+                f"func (c *{class_name}) {method}(value int) int {{",
+                "\ttotal := 0",
+            ]
+            lines += [f"\ttotal += value * {i}" for i in range(spec.body_lines)]
+            lines += [f"\treturn {spec.calls[0]}(total)", "}", ""]
+    for function in spec.functions:
+        lines += [f"func {function}(value int) int {{", "\tfmt.Println(value)"]
+        lines += [f"\tvalue += {i}" for i in range(spec.body_lines)]
+        lines += [f"\treturn {spec.calls[-1]}(value)", "}", ""]
+    return "\n".join(lines)
+
+
+def render_rust(spec: FileSpec) -> str:
+    lines = [f"use crate::{module.replace('/', '::')};" for module in spec.imports]
+    lines += ["use std::collections::HashMap;", ""]
+    for class_name, methods in spec.classes:
+        lines += [f"pub struct {class_name} {{", "    limit: i64,", "}", ""]
+        lines += [f"impl {class_name} {{"]
+        for method in methods:
+            lines += [f"    pub fn {method}(&self, value: i64) -> i64 {{"]
+            lines += ["        let mut total = 0;"]
+            lines += [f"        total += value * {i};" for i in range(spec.body_lines)]
+            lines += [f"        {spec.calls[0]}(total)", "    }", ""]
+        lines += ["}", ""]
+    for function in spec.functions:
+        lines += [f"pub fn {function}(value: i64) -> i64 {{", "    let mut v = value;"]
+        lines += [f"    v += {i};" for i in range(spec.body_lines)]
+        lines += [f"    {spec.calls[-1]}(v)", "}", ""]
+    return "\n".join(lines)
+
+
+def render_c(spec: FileSpec, cpp: bool = False) -> str:
+    lines = [f'#include "{module}.h"' for module in spec.imports]
+    lines += ["#include <stdio.h>", ""]
+    for class_name, methods in spec.classes:
+        if cpp:
+            lines += [f"class {class_name} {{", "public:", "    int limit;", ""]
+            for method in methods:
+                lines += [f"    int {method}(int value) {{", "        int total = 0;"]
+                lines += [
+                    f"        total += value * {i};" for i in range(spec.body_lines)
+                ]
+                lines += [f"        return {spec.calls[0]}(total);", "    }", ""]
+            lines += ["};", ""]
+        else:
+            lines += [f"struct {class_name.lower()} {{", "    int limit;", "};", ""]
+    for function in spec.functions:
+        lines += [f"int {function}(int value) {{", '    printf("%d", value);']
+        lines += [f"    value += {i};" for i in range(spec.body_lines)]
+        lines += [f"    return {spec.calls[-1]}(value);", "}", ""]
+    return "\n".join(lines)
+
+
+RENDERERS: dict[str, Callable[[FileSpec], str]] = {
+    "python": render_python,
+    "javascript": render_javascript,
+    "typescript": lambda spec: render_javascript(spec, typed=True),
+    "tsx": lambda spec: render_javascript(spec, typed=True, jsx=True),
+    "java": render_java,
+    "go": render_go,
+    "rust": render_rust,
+    "c": render_c,
+    "cpp": lambda spec: render_c(spec, cpp=True),
+}
+
+# Identifier style per language, for generated function and method names.
+NAMING = {
+    "python": snake,
+    "rust": snake,
+    "c": snake,
+    "go": pascal,
+}
+
+
+class SyntheticRepoGenerator:
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def generate(
+        self,
+        files: int,
+        language_mix: dict[str, float] | None = None,
+        pathological: bool = True,
+        scale: int = 1,
+    ) -> list[SyntheticFile]:
+        """``files`` regular files spread over the languages in ``language_mix``
+        (relative weights, every language equally by default), plus the
+        pathological files sized by ``scale``."""
+        language_mix = language_mix or dict.fromkeys(
+            sorted(set(EXTENSION_TO_LANGUAGE.values())), 1.0
+        )
+        unknown = set(language_mix) - set(RENDERERS)
+        if unknown:
+            raise ValueError(f"Unsupported languages: {', '.join(sorted(unknown))}")
+
+        languages = list(language_mix)
+        weights = [language_mix[language] for language in languages]
+        modules: list[str] = []
+        generated = []
+
+        for i in range(files):
+            language = self.rng.choices(languages, weights)[0]
+            package = f"pkg{i % max(1, files // 20)}"
+            module = f"src/{package}/{self.pick_name(snake)}_{i}"
+            spec = self.build_spec(module, language, modules)
+            modules.append(module)
+            generated.append(
+                SyntheticFile(
+                    path=f"{module}{LANGUAGE_EXTENSIONS[language]}",
+                    content=RENDERERS[language](spec),
+                    language=language,
+                )
+            )
+
+        if pathological:
+            generated.extend(self.generate_pathological(scale))
+        return generated
+
+    def pick_name(self, style: Callable[[list[str]], str]) -> str:
+        return style([self.rng.choice(VERBS), self.rng.choice(NOUNS)])
+
+    def build_spec(self, module: str, language: str, modules: list[str]) -> FileSpec:
+        style = NAMING.get(language, camel)
+        functions = [
+            f"{self.pick_name(style)}{i}" for i in range(self.rng.randint(3, 8))
+        ]
+        classes = [
+            (
+                f"{pascal([self.rng.choice(NOUNS), 'service'])}{i}",
+                [f"{self.pick_name(style)}{j}" for j in range(self.rng.randint(2, 5))],
+            )
+            for i in range(self.rng.randint(0, 2))
+        ]
+        return FileSpec(
+            module=module,
+            classes=classes,
+            functions=functions,
+            imports=self.rng.sample(modules, min(len(modules), 3)),
+            calls=[self.rng.choice(functions), self.rng.choice(functions)],
+            body_lines=self.rng.randint(2, 12),
+        )
+
+    def generate_pathological(self, scale: int) -> list[SyntheticFile]:
+        huge_spec = FileSpec(
+            module="src/huge/generated_tables",
+            classes=[
+                (f"Table{i}", [f"lookup_{j}" for j in range(20)]) for i in range(40)
+            ]
+            * scale,
+            functions=[f"compute_{i}" for i in range(1000 * scale)],
+            imports=[],
+            calls=["compute_0", "compute_1"],
+            body_lines=10,
+        )
+        tiny_functions = "\n".join(
+            f"def tiny_{i}(x):\n    return x + {i}\n" for i in range(5000 * scale)
+        )
+        minified = "".join(
+            f"function m{i}(a,b){{var c=a*{i}+b;return c>{i}?m{max(i - 1, 0)}(c,b):c}}"
+            for i in range(10000 * scale)
+        )
+        return [
+            SyntheticFile(
+                "src/huge/generated_tables.py",
+                render_python(huge_spec),
+                "python",
+                "huge_file",
+            ),
+            SyntheticFile(
+                "src/tiny/tiny.py", tiny_functions, "python", "tiny_functions"
+            ),
+            SyntheticFile(
+                "dist/bundle.min.js", minified + "\n", "javascript", "minified_js"
+            ),
+        ]
@@ -0,0 +1,24 @@
+"""Gunicorn settings. Run one writer and any number of query workers against
+the same chroma_db directory, and route /api/upload to the writer:
+
+    SERVER_ROLE=writer WEB_BIND=127.0.0.1:5001 gunicorn wsgi:app
+    SERVER_ROLE=query WEB_BIND=0.0.0.0:5000 gunicorn wsgi:app
+"""
+
+from utils.contants import SERVER_ROLE, WEB_BIND, WEB_THREADS, WEB_WORKERS
+
+bind = WEB_BIND
+
+# Uploads into a collection are serialized by locks inside one process, so the
+# writer must be a single process; query servers scale out.
+workers = WEB_WORKERS if SERVER_ROLE == "query" else 1
+
+# Streamed answers hold a request open while the LLM responds, so each worker
+# serves several requests on threads.
+worker_class = "gthread"
+threads = WEB_THREADS
+
+# Import the app once in the master and fork ready workers from it. The Chroma
+# client, grammars, LLM and agent graph are created on first use, so each
+# worker still builds its own after the fork.
+preload_app = True
@@ -1,48 +1,108 @@
+from functools import lru_cache
+
 from dotenv import load_dotenv
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ensure_config, patch_config
 from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt.tool_node import ToolCallRequest
 
+from langgraph_agent.context import (
+    compact_messages,
+    dedupe_tool_messages,
+    estimate_tokens,
+)
 from langgraph_agent.prompts import SYSTEM_PROMPT
 from langgraph_agent.tools import all_tools
-from utils.contants import LLM_MODEL
+from services.startup_service import startup_service
+from services.trace_service import trace_service
+from utils.contants import CONTEXT_TOKEN_BUDGET, LLM_MODEL, TOOL_CONCURRENCY
 
 load_dotenv()
 
-from langchain_groq import ChatGroq
 
-llm = ChatGroq(model=LLM_MODEL)
+@lru_cache(maxsize=None)
+def get_llm_with_tools() -> Runnable:
+    """The chat model, bound to the tools. Created on the first call, so that
+    importing the graph doesn't pay for the Groq client."""
+    with startup_service.measure("llm"):
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(model=LLM_MODEL).bind_tools(all_tools)
 
 
 def explainer_agent(state: dict) -> dict:
+    with trace_service.step("node", "agent"):
+        return call_llm(state)
+
+
+def call_llm(state: dict) -> dict:
     messages = state["messages"]
 
     if not any(isinstance(m, SystemMessage) for m in messages):
         messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
 
-    llm_with_tools = llm.bind_tools(all_tools)
+    iteration = state.get("iteration_count", 0)
+    with trace_service.step("context", "compact", iteration=iteration) as step:
+        step.details["tokens_before"] = estimate_tokens(messages)
+        messages, compacted = compact_messages(messages, CONTEXT_TOKEN_BUDGET)
+        step.details["tokens_after"] = estimate_tokens(messages)
+        step.details["compacted_messages"] = compacted
+
+    with trace_service.step("llm", LLM_MODEL, iteration=iteration) as step:
+        response = get_llm_with_tools().invoke(messages)
 
-    response = llm_with_tools.invoke(messages)
+        usage = getattr(response, "usage_metadata", None) or {}
+        step.details["prompt_tokens"] = usage.get("input_tokens", 0)
+        step.details["completion_tokens"] = usage.get("output_tokens", 0)
+        step.details["tool_calls"] = len(getattr(response, "tool_calls", []) or [])
 
     if response is None:
         raise ValueError("Agent didn't return a valid response")
 
     return {
+        **state,
         "messages": messages + [response],
-        "iteration_count": state.get("iteration_count", 0),
+        "iteration_count": iteration,
     }
 
 
+def trace_tool_call(request: ToolCallRequest, execute):
+    tool_call = request.tool_call
+    with trace_service.step("tool", tool_call["name"], args=tool_call["args"]) as step:
+        result = execute(request)
+        if isinstance(result, ToolMessage):
+            step.details["status"] = result.status
+            step.details["output_chars"] = len(str(result.content))
+        return result
+
+
+# ToolNode runs the tool calls of one AIMessage in parallel on the runnable
+# executor; max_concurrency bounds how many run at once.
+tool_node = ToolNode(all_tools, wrap_tool_call=trace_tool_call)
+
+
 def tools_node(state: dict) -> dict:
-    tool_node = ToolNode(all_tools)
-    tool_result = tool_node.invoke(state)
+    with trace_service.step("node", "tools"):
+        return run_tools(state)
+
+
+def run_tools(state: dict) -> dict:
+    config = patch_config(ensure_config(), max_concurrency=TOOL_CONCURRENCY)
+    tool_result = tool_node.invoke(state, config=config)
 
     # Preserve original messages and add tool results
     original_messages = state["messages"]
-    tool_messages = tool_result["messages"]
+    with trace_service.step("context", "dedupe") as step:
+        tool_messages, dropped = dedupe_tool_messages(
+            original_messages, tool_result["messages"]
+        )
+        step.details["duplicate_chunks"] = dropped
 
     iteration_count = state.get("iteration_count", 0) + 1
 
     return {
+        **state,
         "messages": original_messages + tool_messages,
         "iteration_count": iteration_count,
     }
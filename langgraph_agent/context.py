@@ -0,0 +1,130 @@
+import re
+from typing import Callable, Iterator
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from langgraph_agent.tools import FILE_HEADER_PATTERN
+
+SOURCE_SEPARATOR = "-" * 40
+LINES_PATTERN = re.compile(r"^Lines: (\S+)$", re.MULTILINE)
+
+DUPLICATE_NOTE = "(Same chunk as in an earlier tool result.)"
+COMPACTED_NOTE = "(Source omitted to save context; search again to see it.)"
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    """Rough prompt size (about four characters per token); only used to decide
+    when to compact, the exact count comes back in the LLM's usage metadata."""
+    return count_tokens_approximately(messages)
+
+
+def iter_chunks(content: str) -> Iterator[tuple[str, str]]:
+    """(file_path, body) for every ``--- path ---`` chunk in a tool result."""
+    parts = FILE_HEADER_PATTERN.split(content)
+    return zip(parts[1::2], parts[2::2])
+
+
+def rewrite_chunks(content: str, rewrite: Callable[[str, str], str]) -> str:
+    """Apply ``rewrite(file_path, body)`` to every chunk in a tool result. Text
+    before the first chunk header is kept as is."""
+    rewritten = [FILE_HEADER_PATTERN.split(content, 1)[0]]
+    for file_path, body in iter_chunks(content):
+        rewritten.append(f"--- {file_path} ---{rewrite(file_path, body)}")
+    return "".join(rewritten)
+
+
+def get_chunk_key(file_path: str, body: str) -> tuple[str, str]:
+    match = LINES_PATTERN.search(body.split(SOURCE_SEPARATOR, 1)[0])
+    return (file_path, match.group(1) if match else body.strip())
+
+
+def is_summary(body: str) -> bool:
+    return body.rstrip().endswith((DUPLICATE_NOTE, COMPACTED_NOTE))
+
+
+def summarize(body: str, note: str) -> str:
+    """Keep a chunk's type, name and line range but replace its source."""
+    header = (
+        body.split(SOURCE_SEPARATOR, 1)[0].strip() if SOURCE_SEPARATOR in body else ""
+    )
+    return "\n" + "\n".join(line for line in (header, note) if line) + "\n\n"
+
+
+def dedupe_tool_messages(
+    history: list[BaseMessage], tool_messages: list[ToolMessage]
+) -> tuple[list[ToolMessage], int]:
+    """Replace chunks already shown in full, earlier in the conversation or in
+    another of the new results, with a reference to them. Returns the rewritten
+    messages and how many chunks were dropped."""
+    seen = {
+        get_chunk_key(file_path, body)
+        for message in history
+        if isinstance(message, ToolMessage)
+        for file_path, body in iter_chunks(str(message.content))
+        if not is_summary(body)
+    }
+
+    dropped = 0
+
+    def drop_seen(file_path: str, body: str) -> str:
+        nonlocal dropped
+        if is_summary(body):
+            return body
+        key = get_chunk_key(file_path, body)
+        if key in seen:
+            dropped += 1
+            return summarize(body, DUPLICATE_NOTE)
+        seen.add(key)
+        return body
+
+    deduped = []
+    for message in tool_messages:
+        content = rewrite_chunks(str(message.content), drop_seen)
+        if content != message.content:
+            message = message.model_copy(update={"content": content})
+        deduped.append(message)
+    return deduped, dropped
+
+
+def compact_messages(
+    messages: list[BaseMessage], budget: int
+) -> tuple[list[BaseMessage], int]:
+    """Shrink the history below ``budget`` estimated tokens by reducing the
+    chunks in older tool results to their file and line references, oldest
+    first. The latest round of tool results is always kept whole. Returns the
+    new history and how many tool results were compacted."""
+    tokens = estimate_tokens(messages)
+    if tokens <= budget:
+        return messages, 0
+
+    latest_round = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], AIMessage) and messages[i].tool_calls:
+            latest_round = i
+            break
+
+    compacted = list(messages)
+    count = 0
+    for i in range(latest_round):
+        if tokens <= budget:
+            break
+        message = compacted[i]
+        if not isinstance(message, ToolMessage):
+            continue
+
+        content = rewrite_chunks(
+            str(message.content),
+            lambda path, body: (
+                body if is_summary(body) else summarize(body, COMPACTED_NOTE)
+            ),
+        )
+        if content == message.content:
+            continue
+
+        replacement = message.model_copy(update={"content": content})
+        tokens -= estimate_tokens([message]) - estimate_tokens([replacement])
+        compacted[i] = replacement
+        count += 1
+
+    return compacted, count
@@ -44,4 +44,7 @@ Available tools:
 - search_by_file_type: Search within specific file types (.py, .js, etc.)
 - get_codebase_stats: Get info about the indexed codebase
 - search_imports_and_dependencies: Find imports and dependencies
+- find_definition: Jump straight to a named class, function or method (prefer this when the question names a symbol)
+- find_callers / find_callees: Who calls a function, and what it calls, across several hops in one call
+- find_importers: Which files depend on a module, file or package
 """
@@ -1,44 +1,128 @@
+import re
+from typing import TYPE_CHECKING, Annotated, Optional
+
 from langchain_core.tools import tool
+from langgraph.prebuilt import InjectedState
+
+from models.chroma_model import RetrievalMode, SearchFilters
+from models.excerpt_model import FileExcerpt
+from models.graph_model import GraphNode
+from models.symbol_model import Symbol
 from repositories.chroma_repository import chroma_repository
+from services.chunk_merge_service import chunk_merge_service
+from services.code_graph_service import code_graph_service
+from services.retrieval_service import retrieval_service
+from services.symbol_table_service import symbol_table_service
+
+if TYPE_CHECKING:
+    from chromadb import QueryResult
+
+# Every tool is scoped to the project named in the graph state. The argument is
+# injected by ToolNode and hidden from the model.
+Project = Annotated[str, InjectedState("project")]
+
+MAX_DEFINITIONS = 5
+MAX_GRAPH_HOPS = 3
+MAX_GRAPH_RESULTS = 50
+
+FILE_HEADER_PATTERN = re.compile(r"^--- (.+?) ---$", re.MULTILINE)
+
+
+def extract_file_references(tool_output: str) -> list[str]:
+    """File paths named in a tool result's chunk headers, in order of appearance."""
+    return list(dict.fromkeys(FILE_HEADER_PATTERN.findall(tool_output)))
+
+
+def format_chunks(results: "QueryResult") -> list[str]:
+    """One block per file, with overlapping and adjacent chunks merged."""
+    return [format_excerpt(excerpt) for excerpt in chunk_merge_service.merge(results)]
+
+
+def format_excerpt(excerpt: FileExcerpt) -> str:
+    if excerpt.chunk_count == 1:
+        chunk_type, name = excerpt.segments[0].chunks[0].split(" ", 1)
+        description = f"Type: {chunk_type} | Name: {name}"
+    else:
+        chunks = [chunk for segment in excerpt.segments for chunk in segment.chunks]
+        description = f"Chunks: {', '.join(chunks)}"
+
+    line_ranges = ",".join(segment.line_range for segment in excerpt.segments)
+    if len(excerpt.segments) == 1:
+        source = "\n".join(excerpt.segments[0].lines)
+    else:
+        source = "\n...\n".join(
+            f"[lines {segment.line_range}]\n" + "\n".join(segment.lines)
+            for segment in excerpt.segments
+        )
+
+    return f"""
+--- {excerpt.file_path} ---
+{description}
+Lines: {line_ranges}
+{'-' * 40}
+{source}
+"""
 
 
 @tool
-def search_codebase(query: str) -> str:
+def search_codebase(
+    query: str,
+    project: Project,
+    language: Optional[str] = None,
+    chunk_type: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    parent_class: Optional[str] = None,
+    contains: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> str:
     """
     Search the codebase for relevant code chunks based on a natural language query.
     Use this to find functions, classes, imports, or any code related to the user's question.
+    The optional filters narrow the search before ranking, so only matching chunks are returned.
 
     Args:
         query: A natural language description of what code to find.
                Examples: "authentication logic", "database connection", "API endpoints"
+        language: Only search this language (python, javascript, typescript, tsx,
+                  java, go, rust, c, cpp).
+        chunk_type: Only search this kind of chunk (class, function, method, module).
+        path_prefix: Only search files under this directory (e.g. "src/api").
+        parent_class: Only search methods of this class.
+        contains: Only search chunks whose text contains this exact string.
+        mode: How to rank: "vector" (meaning), "lexical" (identifiers and
+              keywords) or "hybrid" (both). Defaults to the server setting.
 
     Returns:
         Relevant code chunks with file paths and metadata.
     """
-    results = chroma_repository.query(query, n_results=5)
+    modes = [retrieval_mode.value for retrieval_mode in RetrievalMode]
+    if mode is not None and mode not in modes:
+        return f"Unknown search mode '{mode}', expected one of: {', '.join(modes)}."
 
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
+    filters = SearchFilters(
+        language=language,
+        chunk_type=chunk_type,
+        path_prefix=path_prefix,
+        parent_class=parent_class,
+        contains=contains,
+    )
+    results = retrieval_service.query(
+        query,
+        n_results=5,
+        project=project,
+        filters=filters,
+        mode=RetrievalMode(mode) if mode else None,
+    )
 
-    if not documents:
+    formatted_results = format_chunks(results)
+    if not formatted_results:
         return "No relevant code found in the codebase."
 
-    formatted_results = []
-    for doc, meta in zip(documents, metadatas):
-        chunk_info = f"""
---- {meta.get('file_path', 'unknown')} ---
-Type: {meta.get('chunk_type', 'unknown')} | Name: {meta.get('name', 'unknown')}
-Lines: {meta.get('start_line', '?')}-{meta.get('end_line', '?')}
-{'-' * 40}
-{doc}
-"""
-        formatted_results.append(chunk_info)
-
     return "\n".join(formatted_results)
 
 
 @tool
-def search_by_file_type(file_extension: str, query: str) -> str:
+def search_by_file_type(file_extension: str, query: str, project: Project) -> str:
     """
     Search for code in files with a specific extension.
     Use this when the user asks about a specific language or file type.
@@ -50,32 +134,22 @@ def search_by_file_type(file_extension: str, query: str) -> str:
     Returns:
         Relevant code chunks from files matching the extension.
     """
-    results = chroma_repository.query(query, n_results=10)
-
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-
-    filtered_results = []
-    for doc, meta in zip(documents, metadatas):
-        file_path = meta.get("file_path", "")
-        if file_path.endswith(file_extension):
-            chunk_info = f"""
---- {file_path} ---
-Type: {meta.get('chunk_type', 'unknown')} | Name: {meta.get('name', 'unknown')}
-Lines: {meta.get('start_line', '?')}-{meta.get('end_line', '?')}
-{'-' * 40}
-{doc}
-"""
-            filtered_results.append(chunk_info)
+    results = retrieval_service.query(
+        query,
+        n_results=10,
+        project=project,
+        filters=SearchFilters(extension=file_extension),
+    )
 
-    if not filtered_results:
+    formatted_results = format_chunks(results)
+    if not formatted_results:
         return f"No relevant code found in {file_extension} files."
 
-    return "\n".join(filtered_results)
+    return "\n".join(formatted_results)
 
 
 @tool
-def get_codebase_stats() -> str:
+def get_codebase_stats(project: Project) -> str:
     """
     Get statistics about the indexed codebase.
     Use this to understand the scope of the codebase before answering questions.
@@ -83,12 +157,12 @@ def get_codebase_stats() -> str:
     Returns:
         Statistics including total chunks and collection name.
     """
-    stats = chroma_repository.get_stats()
-    return f"Codebase contains {stats['total_documents']} indexed code chunks in collection '{stats['collection_name']}'."
+    stats = chroma_repository.get_stats(project)
+    return f"Codebase contains {stats.total_documents} indexed code chunks in collection '{stats.collection_name}'."
 
 
 @tool
-def search_imports_and_dependencies(query: str) -> str:
+def search_imports_and_dependencies(query: str, project: Project) -> str:
     """
     Search specifically for imports, dependencies, and module-level code.
     Use this to understand what libraries and frameworks the codebase uses.
@@ -99,24 +173,201 @@ def search_imports_and_dependencies(query: str) -> str:
     Returns:
         Import statements and module-level code related to the query.
     """
-    results = chroma_repository.query(f"import {query}", n_results=10)
+    results = retrieval_service.query(
+        f"import {query}",
+        n_results=5,
+        project=project,
+        filters=SearchFilters(chunk_type="module"),
+    )
 
     documents = results.get("documents", [[]])[0]
     metadatas = results.get("metadatas", [[]])[0]
 
-    filtered_results = []
+    formatted_results = []
     for doc, meta in zip(documents, metadatas):
-        if meta.get("chunk_type") == "module" or "import" in doc.lower():
-            chunk_info = f"""
+        chunk_info = f"""
 --- {meta.get('file_path', 'unknown')} ---
 {doc}
 """
-            filtered_results.append(chunk_info)
+        formatted_results.append(chunk_info)
 
-    if not filtered_results:
+    if not formatted_results:
         return f"No imports or dependencies found related to '{query}'."
 
-    return "\n".join(filtered_results[:5])
+    return "\n".join(formatted_results)
+
+
+@tool
+def find_definition(symbol: str, project: Project) -> str:
+    """
+    Look up where a class, function or method is defined, by exact name.
+    Use this when the user names a specific symbol ("where is X defined",
+    "what does X do"). It is much faster than searching, but only matches names.
+
+    Args:
+        symbol: The symbol name, optionally qualified with its class
+                (e.g. "semantic_chunk" or "CodeChunkService.semantic_chunk").
+
+    Returns:
+        Each matching definition with its file path, line range and source.
+        A very large class is shown as an outline of its signatures; look its
+        methods up by name for their bodies.
+    """
+    symbols = symbol_table_service.get_table(project).lookup(symbol)
+    if not symbols:
+        return f"No definition found for '{symbol}'."
+
+    formatted_results = []
+    for match in symbols[:MAX_DEFINITIONS]:
+        source = get_definition_source(match, project)
+        formatted_results.append(f"""
+--- {match.file_path} ---
+Kind: {match.kind} | Name: {match.qualified_name}
+Lines: {match.start_line}-{match.end_line}
+{'-' * 40}
+{source}
+""")
+
+    return "\n".join(formatted_results)
+
+
+def get_definition_source(match: Symbol, project: str) -> str:
+    """The definition's source, joined from every chunk it was split across.
+
+    Contiguous chunks are placed by line number. A class too large for one
+    chunk is only stored as an outline of its signatures plus its methods; when
+    its lines can't all be placed, the outline is returned instead.
+    """
+    stored = chroma_repository.get_line_range(
+        match.file_path, match.start_line, match.end_line, project
+    )
+    lines_by_number: dict[int, str] = {}
+    outline: list[tuple[int, list[str]]] = []
+    for document, metadata in zip(stored["documents"], stored["metadatas"]):
+        # The chunk text follows a header and a blank line.
+        lines = document.split("\n\n", 1)[-1].split("\n")
+        start_line = int(metadata.get("start_line") or 0)
+        end_line = int(metadata.get("end_line") or 0)
+
+        contiguous = metadata.get("contiguous", True)
+        if contiguous and end_line - start_line + 1 == len(lines):
+            for offset, line in enumerate(lines):
+                lines_by_number.setdefault(start_line + offset, line)
+        elif (
+            metadata.get("name") == match.name
+            and metadata.get("chunk_type") == match.kind
+        ):
+            outline.append((start_line, lines))
+
+    numbers = range(match.start_line, match.end_line + 1)
+    if outline and any(number not in lines_by_number for number in numbers):
+        return "\n".join(line for _, lines in sorted(outline) for line in lines)
+    return "\n".join(
+        lines_by_number[number] for number in numbers if number in lines_by_number
+    )
+
+
+def format_graph(title: str, nodes: list[GraphNode], empty: str) -> str:
+    if not nodes:
+        return empty
+
+    lines = [title]
+    for hop in sorted({node.hop for node in nodes}):
+        lines.append(f"Hop {hop}:")
+        for node in nodes:
+            if node.hop != hop:
+                continue
+            if node.name == node.file_path:
+                lines.append(f"  {node.file_path}")
+            else:
+                lines.append(f"  {node.name} ({node.file_path}:{node.line})")
+    return "\n".join(lines)
+
+
+@tool
+def find_callers(symbol: str, project: Project, hops: int = 1) -> str:
+    """
+    Find the functions and methods that call a given function or method.
+    Use this for "what calls X" or "where is X used" questions instead of
+    several searches. Calls are matched by name.
+
+    Args:
+        symbol: Function or method name, optionally qualified (e.g. "Class.method").
+        hops: How many levels of callers to follow (1-3). 2 also returns the
+              callers of the callers.
+
+    Returns:
+        Callers grouped by hop, with the file and line of each call.
+    """
+    hops = max(1, min(hops, MAX_GRAPH_HOPS))
+    nodes = code_graph_service.get_graph(project).find_callers(
+        symbol, hops, MAX_GRAPH_RESULTS
+    )
+    return format_graph(
+        f"Callers of '{symbol}' (up to {hops} hops):",
+        nodes,
+        f"No callers found for '{symbol}'.",
+    )
+
+
+@tool
+def find_callees(symbol: str, project: Project, hops: int = 1) -> str:
+    """
+    Find the functions and methods called by a given function, method or file.
+    Use this to see what a piece of code depends on at runtime.
+
+    Args:
+        symbol: Function or method name, optionally qualified (e.g. "Class.method"),
+                or a file path for its module-level code.
+        hops: How many levels of calls to follow (1-3).
+
+    Returns:
+        Called names grouped by hop, with the file and line of each call. Names
+        not defined in the indexed codebase (builtins, libraries) are listed last.
+    """
+    hops = max(1, min(hops, MAX_GRAPH_HOPS))
+    nodes = code_graph_service.get_graph(project).find_callees(
+        symbol, hops, MAX_GRAPH_RESULTS
+    )
+
+    symbol_table = symbol_table_service.get_table(project)
+    defined = [node for node in nodes if symbol_table.lookup(node.name)]
+    external = sorted({node.name for node in nodes if node not in defined})
+
+    result = format_graph(
+        f"Callees of '{symbol}' (up to {hops} hops):",
+        defined,
+        f"No calls to indexed code found for '{symbol}'.",
+    )
+    if external:
+        result += f"\nOutside the index: {', '.join(external)}"
+    return result
+
+
+@tool
+def find_importers(module: str, project: Project, hops: int = 1) -> str:
+    """
+    Find the files that import a module, file or package.
+    Use this for "what depends on Y" questions.
+
+    Args:
+        module: A file path ("services/upload_service.py"), module name
+                ("services.upload_service") or package ("flask").
+        hops: How many levels of importers to follow (1-3). 2 also returns the
+              files that import those importers.
+
+    Returns:
+        Importing files grouped by hop.
+    """
+    hops = max(1, min(hops, MAX_GRAPH_HOPS))
+    nodes = code_graph_service.get_graph(project).find_importers(
+        module, hops, MAX_GRAPH_RESULTS
+    )
+    return format_graph(
+        f"Files importing '{module}' (up to {hops} hops):",
+        nodes,
+        f"No files import '{module}'.",
+    )
 
 
 all_tools = [
@@ -124,4 +375,8 @@ all_tools = [
     search_by_file_type,
     get_codebase_stats,
     search_imports_and_dependencies,
+    find_definition,
+    find_callers,
+    find_callees,
+    find_importers,
 ]
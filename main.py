@@ -1,20 +1,36 @@
+# Imported first, so start-up timings cover every other import.
+from services.startup_service import startup_service
+
 from flask import Flask
 from flask_cors import CORS
 
 from api.query_api import query_bp
+from api.system_api import system_bp
 from api.upload_api import upload_bp
+from utils.contants import SERVER_ROLE, SERVER_ROLES
 
 
 def create_app() -> Flask:
+    if SERVER_ROLE not in SERVER_ROLES:
+        raise ValueError(
+            f"SERVER_ROLE must be one of {', '.join(SERVER_ROLES)}, "
+            f"got {SERVER_ROLE!r}"
+        )
+
     flask_app = Flask(__name__)
     CORS(flask_app)
 
-    flask_app.register_blueprint(upload_bp)
+    # Query servers open the index read-only and don't accept uploads.
+    if SERVER_ROLE == "writer":
+        flask_app.register_blueprint(upload_bp)
     flask_app.register_blueprint(query_bp)
+    flask_app.register_blueprint(system_bp)
 
+    startup_service.mark_ready()
     return flask_app
 
 
 if __name__ == "__main__":
     app = create_app()
+    print(startup_service.get_report().format())
     app.run(debug=True, port=5000)
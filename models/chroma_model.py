@@ -1,7 +1,96 @@
 from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
 
 
 @dataclass
 class ChromaStats:
     total_documents: int
     collection_name: str
+
+
+class RetrievalMode(Enum):
+    VECTOR = "vector"
+    LEXICAL = "lexical"
+    HYBRID = "hybrid"
+
+
+@dataclass
+class RetrievalCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+    ttl_seconds: float
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": self.size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Restrictions applied inside Chroma before nearest neighbours are ranked."""
+
+    language: Optional[str] = None
+    chunk_type: Optional[str] = None
+    path_prefix: Optional[str] = None
+    parent_class: Optional[str] = None
+    extension: Optional[str] = None
+    contains: Optional[str] = None
+
+    @property
+    def normalized_extension(self) -> str:
+        extension = (self.extension or "").lower()
+        if extension and not extension.startswith("."):
+            extension = f".{extension}"
+        return extension
+
+    def matches(self, metadata: dict, directories: Optional[list[str]] = None) -> bool:
+        """Whether chunk metadata passes the metadata filters, as ``to_where``."""
+        return (
+            (not self.language or metadata.get("language") == self.language)
+            and (not self.chunk_type or metadata.get("chunk_type") == self.chunk_type)
+            and (
+                not self.parent_class
+                or metadata.get("parent_class") == self.parent_class
+            )
+            and (
+                not self.extension
+                or metadata.get("extension") == self.normalized_extension
+            )
+            and (directories is None or metadata.get("directory") in directories)
+        )
+
+    def to_where(self, directories: Optional[list[str]] = None) -> Optional[dict]:
+        """Metadata conditions. ``directories`` is the path prefix resolved to the
+        indexed directories under it, since Chroma can't match string prefixes."""
+        conditions: list[dict] = []
+        if self.language:
+            conditions.append({"language": self.language})
+        if self.chunk_type:
+            conditions.append({"chunk_type": self.chunk_type})
+        if self.parent_class:
+            conditions.append({"parent_class": self.parent_class})
+        if self.extension:
+            conditions.append({"extension": self.normalized_extension})
+        if directories is not None:
+            conditions.append({"directory": {"$in": directories}})
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    def to_where_document(self) -> Optional[dict]:
+        return {"$contains": self.contains} if self.contains else None
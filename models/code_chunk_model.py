@@ -1,8 +1,11 @@
-from dataclasses import dataclass
+import posixpath
+from dataclasses import dataclass, field
 from typing import Optional
 
+from models.symbol_model import Symbol
 
-@dataclass
+
+@dataclass(slots=True)
 class CodeChunk:
     content: str
     chunk_type: str
@@ -12,6 +15,12 @@ class CodeChunk:
     start_line: int
     end_line: int
     parent_class: Optional[str] = None
+    # Definitions inside this chunk, including methods of a class chunk that
+    # are not chunked on their own.
+    symbols: list[Symbol] = field(default_factory=list)
+    # False when the content is not the verbatim source of start_line through
+    # end_line, as in a class skeleton whose method bodies are elided.
+    contiguous: bool = True
 
     def to_document(self) -> str:
         header = f"File: {self.file_path}"
@@ -30,4 +39,7 @@ class CodeChunk:
             "start_line": self.start_line,
             "end_line": self.end_line,
             "parent_class": self.parent_class or "",
+            "extension": posixpath.splitext(self.file_path)[1].lower(),
+            "directory": posixpath.dirname(self.file_path),
+            "contiguous": self.contiguous,
         }
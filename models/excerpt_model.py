@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class ExcerptSegment:
+    """A run of source lines from one file, covering one or more chunks."""
+
+    start_line: int
+    end_line: int
+    lines: list[str]
+    # "type name" for every chunk merged into this segment, in line order.
+    chunks: list[str] = field(default_factory=list)
+    # Module-level chunks gather lines from all over the file, so their text
+    # doesn't line up with their line range and they are never merged.
+    contiguous: bool = True
+
+    @property
+    def line_range(self) -> str:
+        return f"{self.start_line}-{self.end_line}"
+
+
+@dataclass(slots=True)
+class FileExcerpt:
+    file_path: str
+    segments: list[ExcerptSegment] = field(default_factory=list)
+
+    @property
+    def chunk_count(self) -> int:
+        return sum(len(segment.chunks) for segment in self.segments)
@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class CallSite:
+    caller: str
+    callee: str
+    line: int
+
+
+@dataclass(slots=True)
+class FileEdges:
+    """Import specifiers and call sites found in one file.
+
+    ``caller`` is the qualified name of the enclosing definition, or empty for
+    module-level code.
+    """
+
+    file_path: str
+    language: str = ""
+    imports: list[str] = field(default_factory=list)
+    calls: list[CallSite] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "language": self.language,
+            "imports": self.imports,
+            "calls": [[call.caller, call.callee, call.line] for call in self.calls],
+        }
+
+    @classmethod
+    def from_dict(cls, file_path: str, data: dict) -> "FileEdges":
+        return cls(
+            file_path=file_path,
+            language=data.get("language", ""),
+            imports=data.get("imports", []),
+            calls=[CallSite(*call) for call in data.get("calls", [])],
+        )
+
+
+@dataclass
+class GraphNode:
+    name: str
+    file_path: str
+    line: int
+    hop: int
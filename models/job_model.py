@@ -0,0 +1,63 @@
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+from models.upload_model import UploadProgress, UploadResponse
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class UploadJob:
+    job_id: str
+    folder_name: str
+    total_files: int
+    status: JobStatus = JobStatus.QUEUED
+    progress: UploadProgress = field(default_factory=UploadProgress)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[UploadResponse] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (
+            JobStatus.SUCCEEDED,
+            JobStatus.FAILED,
+            JobStatus.CANCELLED,
+        )
+
+    def to_dict(self) -> dict:
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        return {
+            "job_id": self.job_id,
+            "folder_name": self.folder_name,
+            "status": self.status.value,
+            # A git sync learns how many files changed once it starts.
+            "total_files": (
+                self.progress.total_files
+                if self.progress.total_files is not None
+                else self.total_files
+            ),
+            "files_processed": self.progress.files_processed,
+            "chunks_written": self.progress.chunks_written,
+            "files_per_second": (
+                round(self.progress.files_processed / elapsed, 2) if elapsed else 0.0
+            ),
+            "chunks_per_second": (
+                round(self.progress.chunks_written / elapsed, 2) if elapsed else 0.0
+            ),
+            "elapsed_seconds": round(elapsed, 2),
+            "errors": list(self.progress.errors),
+            "result": self.result.to_dict() if self.result else None,
+        }
@@ -0,0 +1,26 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class LexicalDocument:
+    file_path: str
+    length: int
+    terms: dict[str, int]
+    metadata: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "file_path": self.file_path,
+            "length": self.length,
+            "terms": self.terms,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LexicalDocument":
+        return cls(
+            file_path=data["file_path"],
+            length=data["length"],
+            terms=data["terms"],
+            metadata=data.get("metadata", {}),
+        )
@@ -1,13 +1,32 @@
+import json
 from dataclasses import dataclass
+from typing import Optional
+
+from models.trace_model import QueryTrace
 
 
 @dataclass
 class QueryResponse:
     question: str
     answer_html: str
+    project: str
+    debug: Optional[QueryTrace] = None
 
     def to_dict(self) -> dict:
-        return {
+        result = {
             "question": self.question,
             "answer_html": self.answer_html,
+            "project": self.project,
         }
+        if self.debug is not None:
+            result["debug"] = self.debug.to_dict()
+        return result
+
+
+@dataclass
+class QueryStreamEvent:
+    event: str
+    data: dict
+
+    def to_sse(self) -> str:
+        return f"event: {self.event}\ndata: {json.dumps(self.data)}\n\n"
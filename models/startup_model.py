@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class StartupReport:
+    # From the start of the process (or the first import of the startup
+    # service) until the entry point declared itself ready.
+    ready_ms: Optional[float]
+    # How long each lazily initialized component took on first use, in the
+    # order they were first used.
+    components: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "ready_ms": self.ready_ms,
+            "components": dict(self.components),
+            "components_total_ms": round(sum(self.components.values()), 2),
+        }
+
+    def format(self) -> str:
+        lines = [f"ready in {self.ready_ms} ms" if self.ready_ms is not None else ""]
+        lines += [f"{name}: {ms} ms" for name, ms in self.components.items()]
+        return "\n".join(line for line in lines if line)
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Symbol:
+    name: str
+    qualified_name: str
+    kind: str
+    file_path: str
+    start_line: int
+    end_line: int
+    chunk_id: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "qualified_name": self.qualified_name,
+            "kind": self.kind,
+            "file_path": self.file_path,
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "chunk_id": self.chunk_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Symbol":
+        return cls(**data)
@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TraceStep:
+    kind: str
+    name: str
+    offset_ms: float = 0.0
+    duration_ms: float = 0.0
+    details: dict = field(default_factory=dict)
+
+    @property
+    def stage(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "offset_ms": self.offset_ms,
+            "duration_ms": self.duration_ms,
+            **self.details,
+        }
+
+
+@dataclass
+class QueryTrace:
+    question: str
+    project: str
+    duration_ms: float = 0.0
+    steps: list[TraceStep] = field(default_factory=list)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(step.details.get("prompt_tokens", 0) for step in self.steps)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(step.details.get("completion_tokens", 0) for step in self.steps)
+
+    def to_dict(self) -> dict:
+        return {
+            "duration_ms": self.duration_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "steps": [
+                step.to_dict()
+                for step in sorted(self.steps, key=lambda step: step.offset_ms)
+            ],
+        }
+
+
+@dataclass
+class StageStats:
+    stage: str
+    count: int
+    total_ms: float
+    max_ms: float
+    p50_ms: float
+    p95_ms: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.p50_ms,
+            "p95_ms": self.p95_ms,
+            "max_ms": self.max_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+@dataclass
+class TraceStats:
+    stages: list[StageStats]
+
+    def to_dict(self) -> dict:
+        return {"stages": [stage.to_dict() for stage in self.stages]}
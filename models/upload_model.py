@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
 from typing import Optional
 from enum import Enum
 
@@ -7,6 +7,7 @@ class UploadStatus(Enum):
     SUCCESS = "success"
     FAILED = "failed"
     PARTIAL = "partial"
+    CANCELLED = "cancelled"
 
 
 @dataclass
@@ -23,6 +24,32 @@ class UploadRequest:
     destination_folder: str
 
 
+@dataclass
+class BatchReport:
+    index: int
+    chunk_count: int
+    byte_count: int
+    duration_ms: float
+    failed_chunks: int = 0
+
+
+@dataclass
+class IndexChanges:
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+
+@dataclass
+class UploadProgress:
+    files_processed: int = 0
+    chunks_written: int = 0
+    total_files: Optional[int] = None
+    errors: list[str] = field(default_factory=list)
+    cancel_requested: bool = False
+
+
 @dataclass
 class UploadResponse:
     status: UploadStatus
@@ -30,6 +57,10 @@ class UploadResponse:
     uploaded_files: list[str]
     failed_files: list[str]
     destination_path: str
+    total_chunks: int = 0
+    batches: list[BatchReport] = field(default_factory=list)
+    changes: IndexChanges = field(default_factory=IndexChanges)
+    commit: Optional[str] = None
 
     def to_dict(self) -> dict:
         return {
@@ -38,4 +69,8 @@ class UploadResponse:
             "uploaded_files": self.uploaded_files,
             "failed_files": self.failed_files,
             "destination_path": self.destination_path,
+            "total_chunks": self.total_chunks,
+            "batches": [asdict(batch) for batch in self.batches],
+            "changes": asdict(self.changes),
+            "commit": self.commit,
         }
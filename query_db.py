@@ -6,11 +6,16 @@ Run this after uploading a folder to test RAG retrieval.
 Usage:
     python query_db.py "How is authentication implemented?"
     python query_db.py "What does the login function do?" --results 10
+    python query_db.py --timings   # print start-up and first-use timings
 """
 
+# Imported first, so start-up timings cover every other import.
+from services.startup_service import startup_service
+
 import sys
 
 from repositories.chroma_repository import chroma_repository
+from utils.contants import DEFAULT_PROJECT
 
 
 def format_results(results: dict) -> str:
@@ -43,10 +48,12 @@ def format_results(results: dict) -> str:
 
 
 def main():
+    startup_service.mark_ready()
+    project = input(f"Project [{DEFAULT_PROJECT}]: ").strip() or DEFAULT_PROJECT
     query = input("Enter query: ")
 
     try:
-        stats = chroma_repository.get_stats()
+        stats = chroma_repository.get_stats(project)
 
         if stats.total_documents == 0:
             print("❌ No documents in database. Upload a codebase first using the API.")
@@ -56,10 +63,13 @@ def main():
             f"📁 Database: {stats.total_documents} chunks in '{stats.collection_name}'\n"
         )
 
-        results = chroma_repository.query(query)
+        results = chroma_repository.query(query, project=project)
         formatted = format_results(results)
         print(formatted)
 
+        if "--timings" in sys.argv[1:]:
+            print(f"\n{startup_service.get_report().format()}")
+
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
@@ -1,52 +1,374 @@
-import chromadb
-from chromadb import QueryResult, GetResult
-from chromadb.config import Settings
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator
 
 from models.chroma_model import ChromaStats
+from repositories.embedding_cache_repository import EmbeddingCacheRepository
+from repositories.generation_repository import GenerationRepository
+from services.startup_service import startup_service
+from utils.contants import (
+    COLLECTION_CACHE_SIZE,
+    DEFAULT_PROJECT,
+    EMBEDDING_MODEL_ID,
+    SERVER_ROLE,
+)
+from utils.lru_cache import LRUCache
+
+if TYPE_CHECKING:
+    # Importing chromadb takes most of a second, so it happens on first use.
+    from chromadb import Collection, GetResult, QueryResult
+    from chromadb.api import ClientAPI
+    from chromadb.api.types import EmbeddingFunction, Embeddings
+    from chromadb.config import System
+
+
+class ReadOnlyIndexError(Exception):
+    pass
 
 
 class ChromaRepository:
-    COLLECTION_NAME = "codebase_explainer"
     PERSIST_DIR = "chroma_db"
+    MAX_COLLECTION_NAME_LENGTH = 63
+
+    def __init__(
+        self,
+        cache_size: int = COLLECTION_CACHE_SIZE,
+        embedding_function: "EmbeddingFunction | None" = None,
+        embedding_model_id: str = EMBEDDING_MODEL_ID,
+        read_only: bool = SERVER_ROLE == "query",
+    ):
+        # Query servers never write: uploads go to the single writer process,
+        # and query workers pick its changes up through the generation files.
+        self.read_only = read_only
+        # Both are created on first use, see get_client() and
+        # get_embedding_function().
+        self.client: "ClientAPI | None" = None
+        self.embedding_function = embedding_function
+        # Reentrant, since reads open their collection while holding it.
+        self.client_lock = threading.RLock()
+        # Reads running on each client's system. A reload replaces the client;
+        # the old system is stopped once its last read finishes.
+        self.system_users: dict["System", int] = {}
+        self.retired_systems: set["System"] = set()
+        self.embedding_cache = EmbeddingCacheRepository(
+            os.path.join(self.PERSIST_DIR, "embedding_cache"), embedding_model_id
+        )
+        self.collections: "LRUCache[Collection]" = LRUCache(cache_size)
+        self.generation_store = GenerationRepository(
+            os.path.join(self.PERSIST_DIR, "generations")
+        )
+        # The generation of each collection as this process last saw it.
+        self.generations: dict[str, int] = {}
+        self.generation_listeners: list[Callable[[str], None]] = []
 
-    def __init__(self):
-        self.client = chromadb.PersistentClient(
+    def get_client(self) -> "ClientAPI":
+        if self.client is None:
+            with self.client_lock:
+                if self.client is None:
+                    with startup_service.measure("chroma_client"):
+                        self.client = self.create_client()
+        return self.client
+
+    def create_client(self) -> "ClientAPI":
+        import chromadb
+        from chromadb.config import Settings
+
+        return chromadb.PersistentClient(
             path=self.PERSIST_DIR,
             settings=Settings(anonymized_telemetry=False),
         )
-        self.collection = self.get_or_create_collection()
 
-    def get_or_create_collection(self) -> chromadb.Collection:
-        return self.client.get_or_create_collection(
-            name=self.COLLECTION_NAME,
-            metadata={"description": "Codebase files for RAG"},
+    def get_embedding_function(self) -> "EmbeddingFunction":
+        if self.embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+            self.embedding_function = DefaultEmbeddingFunction()
+        return self.embedding_function
+
+    def set_embedding_function(
+        self, embedding_function: "EmbeddingFunction", embedding_model_id: str
+    ) -> None:
+        """Embed with a different function from now on. Open collection handles
+        are dropped, since each is bound to the function it was opened with."""
+        self.embedding_function = embedding_function
+        self.embedding_cache = EmbeddingCacheRepository(
+            os.path.join(self.PERSIST_DIR, "embedding_cache"), embedding_model_id
         )
+        self.collections.clear()
+
+    def get_collection_name(self, project: str = DEFAULT_PROJECT) -> str:
+        """Map a project name onto a valid, stable Chroma collection name."""
+        project = project or DEFAULT_PROJECT
+        slug = re.sub(r"[^a-zA-Z0-9._-]+", "_", project).strip("._-")
 
-    def clear_collection(self) -> None:
-        self.client.delete_collection(name=self.COLLECTION_NAME)
-        self.collection = self.get_or_create_collection()
+        if slug == project and 3 <= len(slug) <= self.MAX_COLLECTION_NAME_LENGTH:
+            return slug
 
-    def get_stats(self) -> ChromaStats:
-        return ChromaStats(
-            total_documents=self.collection.count(),
-            collection_name=self.COLLECTION_NAME,
+        # Sanitizing can make distinct projects collide, so pin the name to the
+        # original with a short hash.
+        digest = hashlib.sha1(project.encode("utf-8")).hexdigest()[:8]
+        return f"{slug[: self.MAX_COLLECTION_NAME_LENGTH - 9] or 'project'}-{digest}"
+
+    def get_collection(self, project: str = DEFAULT_PROJECT) -> "Collection":
+        name = self.get_collection_name(project)
+        return self.collections.get_or_create(
+            name, lambda: self.get_or_create_collection(name)
         )
 
-    def query(self, query_text: str, n_results: int = 5) -> QueryResult:
-        return self.collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
+    def find_collection(self, project: str = DEFAULT_PROJECT) -> "Collection | None":
+        """The project's collection, or None on a read-only server when the
+        project hasn't been indexed yet. Nothing is cached for a missing one, so
+        it's found once the writer creates it."""
+        from chromadb.errors import NotFoundError
+
+        try:
+            return self.get_collection(project)
+        except NotFoundError:
+            return None
+
+    @contextmanager
+    def use_collection(
+        self, project: str = DEFAULT_PROJECT
+    ) -> Iterator["Collection | None"]:
+        """The project's collection, as find_collection() returns it, kept
+        usable until the block exits even if a reload replaces the client."""
+        with self.client_lock:
+            collection = self.find_collection(project)
+            system = self.get_client()._system
+            self.system_users[system] = self.system_users.get(system, 0) + 1
+        try:
+            yield collection
+        finally:
+            self.release_system(system)
+
+    def release_system(self, system: "System") -> None:
+        with self.client_lock:
+            self.system_users[system] -= 1
+            if self.system_users[system]:
+                return
+            del self.system_users[system]
+            if system in self.retired_systems:
+                self.retired_systems.remove(system)
+                system.stop()
+
+    def get_or_create_collection(self, name: str) -> "Collection":
+        if self.read_only:
+            return self.get_client().get_collection(
+                name=name, embedding_function=self.get_embedding_function()
+            )
+        return self.get_client().get_or_create_collection(
+            name=name,
+            metadata={"description": "Codebase files for RAG"},
+            embedding_function=self.get_embedding_function(),
         )
 
-    def add(self, ids: list[str], documents: list[str], metadatas: list[dict]) -> None:
-        self.collection.add(
+    def clear_collection(self, project: str = DEFAULT_PROJECT) -> None:
+        from chromadb.errors import NotFoundError
+
+        self.check_writable()
+        name = self.get_collection_name(project)
+        self.collections.pop(name)
+        try:
+            self.get_client().delete_collection(name=name)
+        except NotFoundError:
+            pass
+
+    def check_writable(self) -> None:
+        if self.read_only:
+            raise ReadOnlyIndexError(
+                "This server is read-only; uploads go to the writer server"
+            )
+
+    def get_generation(self, project: str = DEFAULT_PROJECT) -> int:
+        """The project's index generation, as last written by any process. When
+        another process changed it since this one last looked, the project's
+        cached handles and derived indexes are dropped first."""
+        name = self.get_collection_name(project)
+        # Under the lock, so concurrent requests reload a changed collection
+        # once, and none opens it from the old client in the meantime.
+        with self.client_lock:
+            generation = self.generation_store.load(name)
+            seen = self.generations.get(name)
+            if generation != seen:
+                self.generations[name] = generation
+                if seen is not None:
+                    self.reload(name)
+        return generation
+
+    def bump_generation(self, project: str = DEFAULT_PROJECT) -> int:
+        """Mark the project's index as changed, invalidating derived caches in
+        every process."""
+        self.check_writable()
+        name = self.get_collection_name(project)
+        with self.client_lock:
+            self.generations[name] = self.generation_store.bump(name)
+            return self.generations[name]
+
+    def add_generation_listener(self, listener: Callable[[str], None]) -> None:
+        """Call ``listener`` with a collection's name whenever another process
+        turns out to have changed that collection."""
+        self.generation_listeners.append(listener)
+
+    def reload(self, name: str) -> None:
+        self.collections.pop(name)
+        if self.read_only:
+            self.reset_client()
+        for listener in self.generation_listeners:
+            listener(name)
+
+    def reset_client(self) -> None:
+        """Drop the client, so the next one reads the vector indexes from disk.
+        A client keeps them in memory and never sees another process's writes."""
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        with self.client_lock:
+            # Clearing the registry alone leaves the old system's sqlite
+            # connection and loaded indexes open, so it has to be stopped, but
+            # not under reads still using it.
+            if self.client is not None:
+                system = self.client._system
+                if system in self.system_users:
+                    self.retired_systems.add(system)
+                else:
+                    system.stop()
+            # Chroma shares one client per path within a process; clearing its
+            # registry makes the next PersistentClient a new one.
+            SharedSystemClient.clear_system_cache()
+            self.client = None
+            self.collections.clear()
+
+    def get_stats(self, project: str = DEFAULT_PROJECT) -> ChromaStats:
+        with self.use_collection(project) as collection:
+            return ChromaStats(
+                total_documents=collection.count() if collection is not None else 0,
+                collection_name=self.get_collection_name(project),
+            )
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        project: str = DEFAULT_PROJECT,
+        where: dict | None = None,
+        where_document: dict | None = None,
+    ) -> "QueryResult":
+        with self.use_collection(project) as collection:
+            if collection is None:
+                return {
+                    "ids": [[]],
+                    "documents": [[]],
+                    "metadatas": [[]],
+                    "distances": [[]],
+                }
+            return collection.query(
+                query_texts=[query_text],
+                n_results=n_results,
+                where=where,
+                where_document=where_document,
+            )
+
+    def add(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        project: str = DEFAULT_PROJECT,
+    ) -> None:
+        self.check_writable()
+        self.get_collection(project).add(
+            ids=ids,
+            embeddings=self.embed_documents(documents),
+            documents=documents,
+            metadatas=metadatas,
+        )
+
+    def upsert(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        project: str = DEFAULT_PROJECT,
+    ) -> None:
+        self.check_writable()
+        self.get_collection(project).upsert(
             ids=ids,
+            embeddings=self.embed_documents(documents),
             documents=documents,
             metadatas=metadatas,
         )
 
-    def get_all(self) -> GetResult:
-        return self.collection.get(include=["documents", "metadatas", "embeddings"])
+    def embed_documents(self, documents: list[str]) -> "Embeddings":
+        """Embed documents, reusing cached vectors and embedding only the misses."""
+        embeddings = self.embedding_cache.get_many(documents)
+
+        misses: dict[str, list[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                misses.setdefault(documents[i], []).append(i)
+
+        if misses:
+            miss_documents = list(misses)
+            miss_embeddings = self.get_embedding_function()(miss_documents)
+            self.embedding_cache.put_many(miss_documents, miss_embeddings)
+
+            for document, embedding in zip(miss_documents, miss_embeddings):
+                for i in misses[document]:
+                    embeddings[i] = embedding
+
+        return embeddings
+
+    def delete_files(
+        self, file_paths: list[str], project: str = DEFAULT_PROJECT
+    ) -> None:
+        if not file_paths:
+            return
+        self.check_writable()
+        self.get_collection(project).delete(where={"file_path": {"$in": file_paths}})
+
+    def get_max_batch_size(self) -> int:
+        return self.get_client().get_max_batch_size()
+
+    def get_by_ids(self, ids: list[str], project: str = DEFAULT_PROJECT) -> "GetResult":
+        with self.use_collection(project) as collection:
+            if collection is None:
+                return {"ids": [], "documents": [], "metadatas": []}
+            return collection.get(ids=ids, include=["documents", "metadatas"])
+
+    def get_line_range(
+        self,
+        file_path: str,
+        start_line: int,
+        end_line: int,
+        project: str = DEFAULT_PROJECT,
+    ) -> "GetResult":
+        """Every chunk of ``file_path`` overlapping the given lines."""
+        with self.use_collection(project) as collection:
+            if collection is None:
+                return {"ids": [], "documents": [], "metadatas": []}
+            return collection.get(
+                where={
+                    "$and": [
+                        {"file_path": file_path},
+                        {"start_line": {"$lte": end_line}},
+                        {"end_line": {"$gte": start_line}},
+                    ]
+                },
+                include=["documents", "metadatas"],
+            )
+
+    def get_documents(self, project: str = DEFAULT_PROJECT) -> "GetResult":
+        with self.use_collection(project) as collection:
+            if collection is None:
+                return {"ids": [], "documents": [], "metadatas": []}
+            return collection.get(include=["documents", "metadatas"])
+
+    def get_all(self, project: str = DEFAULT_PROJECT) -> "GetResult":
+        return self.get_collection(project).get(
+            include=["documents", "metadatas", "embeddings"]
+        )
 
 
 chroma_repository = ChromaRepository()
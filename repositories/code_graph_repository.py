@@ -0,0 +1,56 @@
+import json
+import os
+
+from models.graph_model import FileEdges
+from repositories.chroma_repository import ChromaRepository
+
+
+class CodeGraphRepository:
+    """Per-collection sidecar of the imports and call sites in each indexed file."""
+
+    GRAPH_DIR = os.path.join(ChromaRepository.PERSIST_DIR, "graph")
+    GRAPH_VERSION = 1
+
+    def get_path(self, collection_name: str) -> str:
+        return os.path.join(self.GRAPH_DIR, f"{collection_name}.json")
+
+    def load(self, collection_name: str) -> dict[str, FileEdges]:
+        try:
+            with open(self.get_path(collection_name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("version") != self.GRAPH_VERSION:
+            return {}
+        return {
+            file_path: FileEdges.from_dict(file_path, edges)
+            for file_path, edges in data.get("files", {}).items()
+        }
+
+    def save(self, collection_name: str, files: dict[str, FileEdges]) -> None:
+        os.makedirs(self.GRAPH_DIR, exist_ok=True)
+        path = self.get_path(collection_name)
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.GRAPH_VERSION,
+                    "files": {
+                        file_path: edges.to_dict() for file_path, edges in files.items()
+                    },
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    def delete(self, collection_name: str) -> None:
+        try:
+            os.remove(self.get_path(collection_name))
+        except FileNotFoundError:
+            pass
+
+
+code_graph_repository = CodeGraphRepository()
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import re
+import struct
+import threading
+
+import numpy as np
+
+
+class EmbeddingCacheRepository:
+    """Content-addressed store of document embeddings on local disk.
+
+    Vectors live in one append-only file per embedding model: a small header
+    followed by fixed-size records of a SHA-256 digest of the text and the
+    float32 vector. The digest -> record index is rebuilt by scanning the
+    digests on first use, so lookups cost one read per hit.
+    """
+
+    MAGIC = b"EMBC"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHI")
+    DIGEST_SIZE = 32
+    INDEX_READ_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, cache_dir: str, model_id: str):
+        self.cache_dir = cache_dir
+        self.model_id = model_id
+        slug = re.sub(r"[^a-zA-Z0-9._-]+", "_", model_id)
+        self.path = os.path.join(cache_dir, f"{slug}.bin")
+
+        self.index: dict[bytes, int] | None = None
+        self.dimension = 0
+        self.lock = threading.Lock()
+
+    @property
+    def record_size(self) -> int:
+        return self.DIGEST_SIZE + self.dimension * 4
+
+    def get_digest(self, text: str) -> bytes:
+        hasher = hashlib.sha256(self.model_id.encode("utf-8"))
+        hasher.update(b"\0")
+        hasher.update(text.encode("utf-8"))
+        return hasher.digest()
+
+    def load_index(self) -> dict[bytes, int]:
+        if self.index is not None:
+            return self.index
+
+        self.index = {}
+        if not os.path.exists(self.path):
+            return self.index
+
+        with open(self.path, "r+b") as f:
+            header = f.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                return self.index
+
+            magic, version, dimension = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION or dimension == 0:
+                # Unknown layout: start over rather than misread vectors.
+                f.truncate(0)
+                return self.index
+
+            self.dimension = dimension
+            data_size = os.fstat(f.fileno()).st_size - self.HEADER.size
+            count = data_size // self.record_size
+            # Drop a partial record left by an interrupted append.
+            f.truncate(self.HEADER.size + count * self.record_size)
+
+            records_per_read = max(1, self.INDEX_READ_SIZE // self.record_size)
+            f.seek(self.HEADER.size)
+            position = 0
+            while position < count:
+                block = f.read(
+                    min(records_per_read, count - position) * self.record_size
+                )
+                for offset in range(0, len(block), self.record_size):
+                    self.index[block[offset : offset + self.DIGEST_SIZE]] = position
+                    position += 1
+
+        return self.index
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        digests = [self.get_digest(text) for text in texts]
+
+        with self.lock:
+            index = self.load_index()
+            positions = [index.get(digest) for digest in digests]
+            if all(position is None for position in positions):
+                return [None] * len(texts)
+
+            vectors: list[np.ndarray | None] = []
+            with open(self.path, "rb") as f:
+                for position in positions:
+                    if position is None:
+                        vectors.append(None)
+                        continue
+                    f.seek(
+                        self.HEADER.size
+                        + position * self.record_size
+                        + self.DIGEST_SIZE
+                    )
+                    vectors.append(
+                        np.frombuffer(f.read(self.dimension * 4), dtype=np.float32)
+                    )
+            return vectors
+
+    def put_many(self, texts: list[str], vectors: list) -> None:
+        if not texts:
+            return
+
+        with self.lock:
+            index = self.load_index()
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            records: list[bytes] = []
+            new_digests: list[bytes] = []
+            seen: set[bytes] = set()
+            for text, vector in zip(texts, vectors):
+                digest = self.get_digest(text)
+                if digest in index or digest in seen:
+                    continue
+
+                array = np.asarray(vector, dtype=np.float32)
+                if not self.dimension:
+                    self.dimension = len(array)
+                    with open(self.path, "wb") as f:
+                        f.write(
+                            self.HEADER.pack(self.MAGIC, self.VERSION, self.dimension)
+                        )
+                if len(array) != self.dimension:
+                    continue
+
+                records.append(digest + array.tobytes())
+                new_digests.append(digest)
+                seen.add(digest)
+
+            if not records:
+                return
+
+            with open(self.path, "ab") as f:
+                start = (f.tell() - self.HEADER.size) // self.record_size
+                f.write(b"".join(records))
+
+            for offset, digest in enumerate(new_digests):
+                index[digest] = start + offset
@@ -0,0 +1,39 @@
+import json
+import os
+
+
+class GenerationRepository:
+    """One small file per collection holding its index generation, a counter
+    bumped after every upload.
+
+    The files are how an upload in one process reaches the others: a query
+    worker compares a collection's generation with the one its caches were
+    built at, and reloads them when it moved.
+    """
+
+    def __init__(self, generation_dir: str):
+        self.generation_dir = generation_dir
+
+    def get_path(self, collection_name: str) -> str:
+        return os.path.join(self.generation_dir, f"{collection_name}.json")
+
+    def load(self, collection_name: str) -> int:
+        try:
+            with open(self.get_path(collection_name), encoding="utf-8") as f:
+                return int(json.load(f).get("generation", 0))
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+    def bump(self, collection_name: str) -> int:
+        """Increment the generation. Only the writer process bumps, one upload
+        per collection at a time, so reading and rewriting doesn't race."""
+        generation = self.load(collection_name) + 1
+
+        os.makedirs(self.generation_dir, exist_ok=True)
+        path = self.get_path(collection_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation}, f)
+        # Readers see either the old file or the new one, never a partial write.
+        os.replace(tmp_path, path)
+        return generation
@@ -0,0 +1,58 @@
+import json
+import os
+
+from models.lexical_model import LexicalDocument
+from repositories.chroma_repository import ChromaRepository
+
+
+class LexicalIndexRepository:
+    """Per-collection sidecar holding the term counts of every indexed chunk."""
+
+    INDEX_DIR = os.path.join(ChromaRepository.PERSIST_DIR, "lexical")
+    INDEX_VERSION = 1
+
+    def get_path(self, collection_name: str) -> str:
+        return os.path.join(self.INDEX_DIR, f"{collection_name}.json")
+
+    def load(self, collection_name: str) -> dict[str, LexicalDocument] | None:
+        """Documents by chunk id, or None if there is no usable sidecar."""
+        try:
+            with open(self.get_path(collection_name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != self.INDEX_VERSION:
+            return None
+        return {
+            chunk_id: LexicalDocument.from_dict(document)
+            for chunk_id, document in data.get("documents", {}).items()
+        }
+
+    def save(self, collection_name: str, documents: dict[str, LexicalDocument]) -> None:
+        os.makedirs(self.INDEX_DIR, exist_ok=True)
+        path = self.get_path(collection_name)
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.INDEX_VERSION,
+                    "documents": {
+                        chunk_id: document.to_dict()
+                        for chunk_id, document in documents.items()
+                    },
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    def delete(self, collection_name: str) -> None:
+        try:
+            os.remove(self.get_path(collection_name))
+        except FileNotFoundError:
+            pass
+
+
+lexical_index_repository = LexicalIndexRepository()
@@ -0,0 +1,62 @@
+import json
+import os
+
+from repositories.chroma_repository import ChromaRepository
+
+
+class ManifestRepository:
+    """Per-collection map of indexed file paths to content hashes, and the git
+    commit the collection was last synced to."""
+
+    MANIFEST_DIR = os.path.join(ChromaRepository.PERSIST_DIR, "manifests")
+    # Version 2 added the extension and directory chunk metadata used by search
+    # filters, version 3 the symbol table, version 4 the code graph, version 5
+    # the flag marking class skeletons as not contiguous source and version 6
+    # kept a class's last method inside the class's chunk. Older collections
+    # are reindexed in full on their next upload.
+    MANIFEST_VERSION = 6
+
+    def get_path(self, collection_name: str) -> str:
+        return os.path.join(self.MANIFEST_DIR, f"{collection_name}.json")
+
+    def read(self, collection_name: str) -> dict:
+        try:
+            with open(self.get_path(collection_name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # A manifest written by an older chunking format can't vouch for the
+        # chunks in the collection, so treat it as missing.
+        if data.get("version") != self.MANIFEST_VERSION:
+            return {}
+        return data
+
+    def load(self, collection_name: str) -> dict[str, str]:
+        return self.read(collection_name).get("files", {})
+
+    def load_commit(self, collection_name: str) -> str | None:
+        return self.read(collection_name).get("commit")
+
+    def save(
+        self, collection_name: str, files: dict[str, str], commit: str | None = None
+    ) -> None:
+        os.makedirs(self.MANIFEST_DIR, exist_ok=True)
+        path = self.get_path(collection_name)
+        tmp_path = f"{path}.tmp"
+
+        data = {"version": self.MANIFEST_VERSION, "files": files}
+        if commit:
+            data["commit"] = commit
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, collection_name: str) -> None:
+        try:
+            os.remove(self.get_path(collection_name))
+        except FileNotFoundError:
+            pass
+
+
+manifest_repository = ManifestRepository()
@@ -0,0 +1,57 @@
+import json
+import os
+
+from models.symbol_model import Symbol
+from repositories.chroma_repository import ChromaRepository
+
+
+class SymbolTableRepository:
+    """Per-collection sidecar of the definitions found in each indexed file."""
+
+    SYMBOL_DIR = os.path.join(ChromaRepository.PERSIST_DIR, "symbols")
+    SYMBOL_VERSION = 1
+
+    def get_path(self, collection_name: str) -> str:
+        return os.path.join(self.SYMBOL_DIR, f"{collection_name}.json")
+
+    def load(self, collection_name: str) -> dict[str, list[Symbol]]:
+        try:
+            with open(self.get_path(collection_name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("version") != self.SYMBOL_VERSION:
+            return {}
+        return {
+            file_path: [Symbol.from_dict(symbol) for symbol in symbols]
+            for file_path, symbols in data.get("files", {}).items()
+        }
+
+    def save(self, collection_name: str, files: dict[str, list[Symbol]]) -> None:
+        os.makedirs(self.SYMBOL_DIR, exist_ok=True)
+        path = self.get_path(collection_name)
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.SYMBOL_VERSION,
+                    "files": {
+                        file_path: [symbol.to_dict() for symbol in symbols]
+                        for file_path, symbols in files.items()
+                    },
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    def delete(self, collection_name: str) -> None:
+        try:
+            os.remove(self.get_path(collection_name))
+        except FileNotFoundError:
+            pass
+
+
+symbol_table_repository = SymbolTableRepository()
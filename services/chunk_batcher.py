@@ -0,0 +1,145 @@
+import time
+
+from models.code_chunk_model import CodeChunk
+from models.upload_model import BatchReport
+from repositories.chroma_repository import chroma_repository
+from services.lexical_index_service import LexicalIndex
+from utils.contants import (
+    DEFAULT_PROJECT,
+    UPLOAD_BATCH_MAX_BYTES,
+    UPLOAD_BATCH_MAX_CHUNKS,
+)
+
+
+class ChunkBatcher:
+    """Buffers chunks across files and writes each batch with one upsert call.
+
+    When given a lexical index, it mirrors every successful write and delete
+    into it so the two stay in step with the collection.
+    """
+
+    def __init__(
+        self,
+        project: str = DEFAULT_PROJECT,
+        max_chunks: int = UPLOAD_BATCH_MAX_CHUNKS,
+        max_bytes: int = UPLOAD_BATCH_MAX_BYTES,
+        lexical_index: LexicalIndex | None = None,
+    ):
+        self.project = project
+        self.lexical_index = lexical_index
+        self.max_chunks = max(
+            1, min(max_chunks, chroma_repository.get_max_batch_size())
+        )
+        self.max_bytes = max_bytes
+
+        self.pending_ids: list[str] = []
+        self.pending_documents: list[str] = []
+        self.pending_metadatas: list[dict] = []
+        self.pending_bytes = 0
+        self.pending_deletes: set[str] = set()
+
+        self.reports: list[BatchReport] = []
+        self.failed_files: dict[str, str] = {}
+        self.chunks_written = 0
+
+    def add(self, chunk_id: str, chunk: CodeChunk) -> None:
+        document = chunk.to_document()
+        size = len(document.encode("utf-8"))
+
+        if self.pending_ids and self.pending_bytes + size > self.max_bytes:
+            self.flush()
+
+        self.pending_ids.append(chunk_id)
+        self.pending_documents.append(document)
+        self.pending_metadatas.append(chunk.to_metadata())
+        self.pending_bytes += size
+
+        if len(self.pending_ids) >= self.max_chunks:
+            self.flush()
+
+    def replace_file(self, file_path: str) -> None:
+        """Drop the file's previously indexed chunks before the next write."""
+        self.pending_deletes.add(file_path)
+
+    def flush(self) -> BatchReport | None:
+        start = time.perf_counter()
+        self.delete_replaced_files()
+
+        if not self.pending_ids:
+            return None
+
+        ids = self.pending_ids
+        documents = self.pending_documents
+        metadatas = self.pending_metadatas
+        byte_count = self.pending_bytes
+
+        self.pending_ids = []
+        self.pending_documents = []
+        self.pending_metadatas = []
+        self.pending_bytes = 0
+
+        failed_chunks = self.write(ids, documents, metadatas)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        self.chunks_written += len(ids) - failed_chunks
+        report = BatchReport(
+            index=len(self.reports),
+            chunk_count=len(ids),
+            byte_count=byte_count,
+            duration_ms=round(duration_ms, 2),
+            failed_chunks=failed_chunks,
+        )
+        self.reports.append(report)
+        return report
+
+    def delete_replaced_files(self) -> None:
+        if not self.pending_deletes:
+            return
+
+        file_paths = sorted(self.pending_deletes)
+        self.pending_deletes = set()
+
+        try:
+            chroma_repository.delete_files(file_paths, project=self.project)
+            if self.lexical_index is not None:
+                for file_path in file_paths:
+                    self.lexical_index.remove_file(file_path)
+        except Exception as e:
+            # Writing new chunks next to stale ones would duplicate the file, so
+            # hold back this batch's chunks for the files we couldn't clear.
+            for file_path in file_paths:
+                self.failed_files.setdefault(file_path, str(e))
+            self.drop_pending_files(set(file_paths))
+
+    def drop_pending_files(self, file_paths: set[str]) -> None:
+        kept = [
+            i
+            for i, metadata in enumerate(self.pending_metadatas)
+            if metadata["file_path"] not in file_paths
+        ]
+        self.pending_ids = [self.pending_ids[i] for i in kept]
+        self.pending_documents = [self.pending_documents[i] for i in kept]
+        self.pending_metadatas = [self.pending_metadatas[i] for i in kept]
+        self.pending_bytes = sum(
+            len(document.encode("utf-8")) for document in self.pending_documents
+        )
+
+    def write(self, ids: list[str], documents: list[str], metadatas: list[dict]) -> int:
+        """Upsert a batch, bisecting on failure so one bad chunk can't sink the rest."""
+        try:
+            chroma_repository.upsert(
+                ids=ids, documents=documents, metadatas=metadatas, project=self.project
+            )
+            if self.lexical_index is not None:
+                for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                    self.lexical_index.add(chunk_id, document, metadata)
+            return 0
+        except Exception as e:
+            if len(ids) == 1:
+                self.failed_files.setdefault(metadatas[0]["file_path"], str(e))
+                return 1
+
+        mid = len(ids) // 2
+        return self.write(ids[:mid], documents[:mid], metadatas[:mid]) + self.write(
+            ids[mid:], documents[mid:], metadatas[mid:]
+        )
@@ -0,0 +1,76 @@
+from typing import TYPE_CHECKING
+
+from models.excerpt_model import ExcerptSegment, FileExcerpt
+
+if TYPE_CHECKING:
+    from chromadb import QueryResult
+
+
+class ChunkMergeService:
+    """Turns retrieval results into one excerpt per file.
+
+    Chunks of the same file whose line ranges overlap or touch are merged into
+    one segment and chunks contained in another are absorbed, so each source
+    line is shown once. Files keep the order of their best-ranked chunk.
+    """
+
+    def merge(self, results: "QueryResult") -> list[FileExcerpt]:
+        documents = (results.get("documents") or [[]])[0]
+        metadatas = (results.get("metadatas") or [[]])[0]
+
+        segments_by_file: dict[str, list[ExcerptSegment]] = {}
+        for document, metadata in zip(documents, metadatas):
+            file_path = metadata.get("file_path", "unknown")
+            segments_by_file.setdefault(file_path, []).append(
+                self.to_segment(document, metadata)
+            )
+
+        return [
+            FileExcerpt(file_path, self.merge_segments(segments))
+            for file_path, segments in segments_by_file.items()
+        ]
+
+    def to_segment(self, document: str, metadata: dict) -> ExcerptSegment:
+        # Stored documents start with a File/Type/Name header and a blank line.
+        lines = document.split("\n\n", 1)[-1].split("\n")
+        start_line = int(metadata.get("start_line") or 0)
+        end_line = int(metadata.get("end_line") or 0)
+
+        name = metadata.get("name", "unknown")
+        if metadata.get("parent_class"):
+            name = f"{metadata['parent_class']}.{name}"
+
+        return ExcerptSegment(
+            start_line=start_line,
+            end_line=end_line,
+            lines=lines,
+            chunks=[f"{metadata.get('chunk_type', 'unknown')} {name}"],
+            # Chunks indexed before the flag existed are judged by line count.
+            contiguous=bool(metadata.get("contiguous", True))
+            and start_line > 0
+            and end_line - start_line + 1 == len(lines),
+        )
+
+    def merge_segments(self, segments: list[ExcerptSegment]) -> list[ExcerptSegment]:
+        merged: list[ExcerptSegment] = []
+        for segment in sorted(
+            (segment for segment in segments if segment.contiguous),
+            key=lambda segment: (segment.start_line, -segment.end_line),
+        ):
+            last = merged[-1] if merged else None
+            if last is None or segment.start_line > last.end_line + 1:
+                merged.append(segment)
+                continue
+
+            if segment.end_line > last.end_line:
+                last.lines.extend(
+                    segment.lines[last.end_line - segment.start_line + 1 :]
+                )
+                last.end_line = segment.end_line
+            last.chunks.extend(segment.chunks)
+
+        merged.extend(segment for segment in segments if not segment.contiguous)
+        return sorted(merged, key=lambda segment: segment.start_line)
+
+
+chunk_merge_service = ChunkMergeService()
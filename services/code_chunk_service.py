@@ -1,78 +1,156 @@
-from typing import Optional
-
-import tree_sitter_python as tspython
-import tree_sitter_javascript as tsjavascript
-import tree_sitter_typescript as tstypescript
-import tree_sitter_java as tsjava
-import tree_sitter_go as tsgo
-import tree_sitter_rust as tsrust
-import tree_sitter_c as tsc
-import tree_sitter_cpp as tscpp
-from tree_sitter import Language, Parser, QueryCursor
+import importlib
+from typing import Iterable, Iterator, Optional
+
+from tree_sitter import Language, Parser, Query, QueryCursor
 
 from models.code_chunk_model import CodeChunk
+from models.graph_model import CallSite, FileEdges
+from models.symbol_model import Symbol
+from services.startup_service import startup_service
+from utils.contants import CHUNK_TOKEN_BUDGET
+
+# Rough size of a token in source code, for sizing chunks against the budget.
+CHARS_PER_TOKEN = 4
 
+# (line index, text) pairs; the lines of a chunk need not be contiguous.
+NumberedLines = list[tuple[int, str]]
+
+# Each language's grammar is named as (module, function returning the grammar)
+# and loaded the first time a file of that language is chunked.
 LANGUAGE_CONFIG = {
     "python": {
-        "language": Language(tspython.language()),
+        "grammar": ("tree_sitter_python", "language"),
         "function_query": "(function_definition name: (identifier) @name) @function",
         "class_query": "(class_definition name: (identifier) @name) @class",
         "method_query": "(class_definition body: (block (function_definition name: (identifier) @name) @method))",
+        "import_query": """[
+            (import_statement name: (dotted_name) @import)
+            (import_statement name: (aliased_import name: (dotted_name) @import))
+            (import_from_statement module_name: (dotted_name) @import)
+            (import_from_statement module_name: (relative_import) @import)
+        ]""",
+        "call_query": """[
+            (call function: (identifier) @call)
+            (call function: (attribute attribute: (identifier) @call))
+        ]""",
     },
     "javascript": {
-        "language": Language(tsjavascript.language()),
+        "grammar": ("tree_sitter_javascript", "language"),
         "function_query": """[
             (function_declaration name: (identifier) @name) @function
             (arrow_function) @function
             (method_definition name: (property_identifier) @name) @method
         ]""",
         "class_query": "(class_declaration name: (identifier) @name) @class",
+        "import_query": """[
+            (import_statement source: (string (string_fragment) @import))
+            (call_expression
+                function: (identifier) @_require
+                arguments: (arguments . (string (string_fragment) @import))
+                (#eq? @_require "require"))
+        ]""",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (member_expression property: (property_identifier) @call))
+            (new_expression constructor: (identifier) @call)
+        ]""",
     },
     "typescript": {
-        "language": Language(tstypescript.language_typescript()),
+        "grammar": ("tree_sitter_typescript", "language_typescript"),
         "function_query": """[
             (function_declaration name: (identifier) @name) @function
             (arrow_function) @function
             (method_definition name: (property_identifier) @name) @method
         ]""",
-        "class_query": "(class_declaration name: (identifier) @name) @class",
+        "class_query": "(class_declaration name: (type_identifier) @name) @class",
+        "import_query": """[
+            (import_statement source: (string (string_fragment) @import))
+            (call_expression
+                function: (identifier) @_require
+                arguments: (arguments . (string (string_fragment) @import))
+                (#eq? @_require "require"))
+        ]""",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (member_expression property: (property_identifier) @call))
+            (new_expression constructor: (identifier) @call)
+        ]""",
     },
     "tsx": {
-        "language": Language(tstypescript.language_tsx()),
+        "grammar": ("tree_sitter_typescript", "language_tsx"),
         "function_query": """[
             (function_declaration name: (identifier) @name) @function
             (arrow_function) @function
             (method_definition name: (property_identifier) @name) @method
         ]""",
-        "class_query": "(class_declaration name: (identifier) @name) @class",
+        "class_query": "(class_declaration name: (type_identifier) @name) @class",
+        "import_query": """[
+            (import_statement source: (string (string_fragment) @import))
+            (call_expression
+                function: (identifier) @_require
+                arguments: (arguments . (string (string_fragment) @import))
+                (#eq? @_require "require"))
+        ]""",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (member_expression property: (property_identifier) @call))
+            (new_expression constructor: (identifier) @call)
+        ]""",
     },
     "java": {
-        "language": Language(tsjava.language()),
+        "grammar": ("tree_sitter_java", "language"),
         "function_query": "(method_declaration name: (identifier) @name) @function",
         "class_query": "(class_declaration name: (identifier) @name) @class",
+        "import_query": "(import_declaration (scoped_identifier) @import)",
+        "call_query": """[
+            (method_invocation name: (identifier) @call)
+            (object_creation_expression type: (type_identifier) @call)
+        ]""",
     },
     "go": {
-        "language": Language(tsgo.language()),
+        "grammar": ("tree_sitter_go", "language"),
         "function_query": "(function_declaration name: (identifier) @name) @function",
         "class_query": "(type_declaration (type_spec name: (type_identifier) @name)) @class",
+        "import_query": "(import_spec path: (interpreted_string_literal) @import)",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (selector_expression field: (field_identifier) @call))
+        ]""",
     },
     "rust": {
-        "language": Language(tsrust.language()),
+        "grammar": ("tree_sitter_rust", "language"),
         "function_query": "(function_item name: (identifier) @name) @function",
         "class_query": """[
             (struct_item name: (type_identifier) @name) @class
             (impl_item) @class
         ]""",
+        "import_query": "(use_declaration argument: (_) @import)",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (scoped_identifier name: (identifier) @call))
+            (call_expression function: (field_expression field: (field_identifier) @call))
+        ]""",
     },
     "c": {
-        "language": Language(tsc.language()),
+        "grammar": ("tree_sitter_c", "language"),
         "function_query": "(function_definition declarator: (function_declarator declarator: (identifier) @name)) @function",
         "class_query": "(struct_specifier name: (type_identifier) @name) @class",
+        "import_query": "(preproc_include path: (_) @import)",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (field_expression field: (field_identifier) @call))
+        ]""",
     },
     "cpp": {
-        "language": Language(tscpp.language()),
+        "grammar": ("tree_sitter_cpp", "language"),
         "function_query": "(function_definition declarator: (function_declarator declarator: (identifier) @name)) @function",
         "class_query": "(class_specifier name: (type_identifier) @name) @class",
+        "import_query": "(preproc_include path: (_) @import)",
+        "call_query": """[
+            (call_expression function: (identifier) @call)
+            (call_expression function: (field_expression field: (field_identifier) @call))
+            (call_expression function: (qualified_identifier name: (identifier) @call))
+        ]""",
     },
 }
 
@@ -96,14 +174,29 @@ EXTENSION_TO_LANGUAGE = {
 
 
 class CodeChunkService:
-    def __init__(self):
+    def __init__(self, chunk_token_budget: int = CHUNK_TOKEN_BUDGET):
+        self.max_chunk_chars = chunk_token_budget * CHARS_PER_TOKEN
+        self.languages: dict[str, Language] = {}
         self.parsers: dict[str, Parser] = {}
-        self.init_parsers()
-
-    def init_parsers(self) -> None:
-        for lang_name, config in LANGUAGE_CONFIG.items():
-            parser = Parser(config["language"])
-            self.parsers[lang_name] = parser
+        self.queries: dict[str, Query] = {}
+        self.graph_queries: dict[str, Query] = {}
+
+    def get_language(self, language: str) -> Language:
+        grammar = self.languages.get(language)
+        if grammar is None:
+            with startup_service.measure(f"grammar:{language}"):
+                module_name, function_name = LANGUAGE_CONFIG[language]["grammar"]
+                module = importlib.import_module(module_name)
+                grammar = Language(getattr(module, function_name)())
+            self.languages[language] = grammar
+        return grammar
+
+    def get_parser(self, language: str) -> Parser:
+        parser = self.parsers.get(language)
+        if parser is None:
+            parser = Parser(self.get_language(language))
+            self.parsers[language] = parser
+        return parser
 
     def get_language_from_extension(self, file_path: str) -> Optional[str]:
         ext = "." + file_path.rsplit(".", 1)[-1].lower() if "." in file_path else ""
@@ -112,48 +205,143 @@ class CodeChunkService:
     def supports_language(self, file_path: str) -> bool:
         return self.get_language_from_extension(file_path) is not None
 
-    def chunk_code(self, content: str, file_path: str) -> list[CodeChunk]:
+    def chunk_code(
+        self, content: str, file_path: str, edges: Optional[FileEdges] = None
+    ) -> list[CodeChunk]:
+        """Chunk a file. When ``edges`` is given, it is filled with the file's
+        imports and call sites from the same parse."""
         language = self.get_language_from_extension(file_path)
 
         if not language or language not in LANGUAGE_CONFIG:
             return self.fallback_chunk(content, file_path)
 
         try:
-            return self.semantic_chunk(content, file_path, language)
+            return self.semantic_chunk(content, file_path, language, edges)
         except Exception:
             return self.fallback_chunk(content, file_path)
 
-    def run_query(self, language: Language, query_str: str, root_node) -> list[tuple]:
-        """Run a tree-sitter query and return captures as list of (node, capture_name) tuples"""
-        query = language.query(query_str)
-        cursor = QueryCursor(query)
-        captures_dict = cursor.captures(root_node)
+    def get_query(self, language: str) -> Query:
+        """Compile the language's class and function patterns into one query, once."""
+        query = self.queries.get(language)
+        if query is None:
+            config = LANGUAGE_CONFIG[language]
+            source = "\n".join(
+                config[key]
+                for key in ("class_query", "function_query")
+                if key in config
+            )
+            query = Query(self.get_language(language), source)
+            self.queries[language] = query
+        return query
+
+    def run_query(
+        self, language: str, root_node
+    ) -> tuple[list[tuple], list[tuple], dict[int, str]]:
+        """Run the compiled query in a single traversal and return the class and
+        function captures as separate lists of (node, capture_name) tuples, plus a
+        map from each captured node's id to the text of its @name capture"""
+        cursor = QueryCursor(self.get_query(language))
+        class_captures: list[tuple] = []
+        func_captures: list[tuple] = []
+        names: dict[int, str] = {}
+
+        for _, match in cursor.matches(root_node):
+            captures = class_captures if "class" in match else func_captures
+            name_nodes = match.get("name")
+
+            for capture_name, nodes in match.items():
+                if capture_name == "name":
+                    continue
+                for node in nodes:
+                    captures.append((node, capture_name))
+                    if name_nodes and node.id not in names:
+                        names[node.id] = name_nodes[0].text.decode("utf-8")
+
+        # Sort into document order so chunk order (and therefore chunk ids) is
+        # identical across processes.
+        for captures in (class_captures, func_captures):
+            captures.sort(
+                key=lambda capture: (capture[0].start_byte, -capture[0].end_byte)
+            )
+        return class_captures, func_captures, names
+
+    def get_graph_query(self, language: str) -> Query:
+        query = self.graph_queries.get(language)
+        if query is None:
+            config = LANGUAGE_CONFIG[language]
+            source = "\n".join(
+                config[key] for key in ("import_query", "call_query") if key in config
+            )
+            query = Query(self.get_language(language), source)
+            self.graph_queries[language] = query
+        return query
 
-        captures = []
-        for capture_name, nodes in captures_dict.items():
-            for node in nodes:
-                captures.append((node, capture_name))
+    def extract_edges(
+        self,
+        language: str,
+        root_node,
+        symbol_nodes: dict[int, Symbol],
+        edges: FileEdges,
+    ) -> None:
+        """Record import specifiers and call sites, attributing each call to the
+        innermost definition around it."""
+        edges.language = language
+        captures = QueryCursor(self.get_graph_query(language)).captures(root_node)
+
+        for node in sorted(captures.get("import", []), key=lambda n: n.start_byte):
+            specifier = self.normalize_import(node.text.decode("utf-8"), language)
+            if specifier and specifier not in edges.imports:
+                edges.imports.append(specifier)
+
+        seen_calls: set[tuple[str, str]] = set()
+        for node in sorted(captures.get("call", []), key=lambda n: n.start_byte):
+            caller = ""
+            current = node.parent
+            while current:
+                symbol = symbol_nodes.get(current.id)
+                if symbol is not None:
+                    caller = symbol.qualified_name
+                    break
+                current = current.parent
+
+            callee = node.text.decode("utf-8")
+            if (caller, callee) in seen_calls:
+                continue
+            seen_calls.add((caller, callee))
+            edges.calls.append(
+                CallSite(caller=caller, callee=callee, line=node.start_point[0] + 1)
+            )
 
-        return captures
+    def normalize_import(self, specifier: str, language: str) -> str:
+        specifier = specifier.strip().strip("\"'<>")
+        if language == "rust":
+            # use a::b::{c, d} / use a::b as c -> a::b
+            specifier = specifier.split("::{", 1)[0].split(" as ", 1)[0]
+        return specifier
 
     def semantic_chunk(
-        self, content: str, file_path: str, language: str
+        self,
+        content: str,
+        file_path: str,
+        language: str,
+        edges: Optional[FileEdges] = None,
     ) -> list[CodeChunk]:
         chunks: list[CodeChunk] = []
         config = LANGUAGE_CONFIG[language]
-        parser = self.parsers[language]
+        parser = self.get_parser(language)
 
         tree = parser.parse(bytes(content, "utf-8"))
         root_node = tree.root_node
         lines = content.split("\n")
 
         processed_ranges: set[tuple[int, int]] = set()
+        chunks_by_range: dict[tuple[int, int], CodeChunk] = {}
+        symbol_nodes: dict[int, Symbol] = {}
+        nodes_by_range: dict[tuple[int, int], object] = {}
+        class_members: dict[tuple[int, int], list[tuple]] = {}
+        class_captures, func_captures, names = self.run_query(language, root_node)
 
         if "class_query" in config:
-            class_captures = self.run_query(
-                config["language"], config["class_query"], root_node
-            )
-
             for node, capture_name in class_captures:
                 if capture_name == "class":
                     range_key = (node.start_point[0], node.end_point[0])
@@ -161,59 +349,87 @@ class CodeChunkService:
                         continue
                     processed_ranges.add(range_key)
 
-                    class_name = self.get_node_name(node, class_captures, language)
+                    class_name = self.get_node_name(node, names, language)
                     class_content = self.get_node_text(node, lines)
 
-                    chunks.append(
-                        CodeChunk(
-                            content=class_content,
-                            chunk_type="class",
-                            name=class_name,
-                            file_path=file_path,
-                            language=language,
-                            start_line=node.start_point[0] + 1,
-                            end_line=node.end_point[0] + 1,
-                        )
+                    chunk = CodeChunk(
+                        content=class_content,
+                        chunk_type="class",
+                        name=class_name,
+                        file_path=file_path,
+                        language=language,
+                        start_line=node.start_point[0] + 1,
+                        end_line=node.end_point[0] + 1,
                     )
+                    symbol = self.build_symbol(
+                        node,
+                        class_name,
+                        "class",
+                        self.find_parent_class(node, language),
+                        file_path,
+                    )
+                    chunk.symbols.append(symbol)
+                    symbol_nodes[node.id] = symbol
+                    chunks.append(chunk)
+                    chunks_by_range[range_key] = chunk
+                    nodes_by_range[range_key] = node
 
         if "function_query" in config:
-            func_captures = self.run_query(
-                config["language"], config["function_query"], root_node
-            )
-
             for node, capture_name in func_captures:
                 if capture_name in ("function", "method"):
                     range_key = (node.start_point[0], node.end_point[0])
                     if range_key in processed_ranges:
                         continue
 
-                    if self.is_inside_class(node, processed_ranges):
+                    func_name = self.get_node_name(node, names, language)
+                    parent_class = self.find_parent_class(node, language)
+                    symbol = self.build_symbol(
+                        node,
+                        func_name,
+                        "method" if parent_class else "function",
+                        parent_class,
+                        file_path,
+                    )
+                    symbol_nodes[node.id] = symbol
+
+                    enclosing_range = self.get_enclosing_range(node, processed_ranges)
+                    if enclosing_range is not None:
+                        # Covered by its class's chunk, but still a definition.
+                        chunks_by_range[enclosing_range].symbols.append(symbol)
+                        class_members.setdefault(enclosing_range, []).append(
+                            (node, symbol)
+                        )
                         continue
 
                     processed_ranges.add(range_key)
 
-                    func_name = self.get_node_name(node, func_captures, language)
                     func_content = self.get_node_text(node, lines)
-                    parent_class = self.find_parent_class(node, language)
 
-                    chunks.append(
-                        CodeChunk(
-                            content=func_content,
-                            chunk_type="method" if parent_class else "function",
-                            name=func_name,
-                            file_path=file_path,
-                            language=language,
-                            start_line=node.start_point[0] + 1,
-                            end_line=node.end_point[0] + 1,
-                            parent_class=parent_class,
-                        )
+                    chunk = CodeChunk(
+                        content=func_content,
+                        chunk_type=symbol.kind,
+                        name=func_name,
+                        file_path=file_path,
+                        language=language,
+                        start_line=node.start_point[0] + 1,
+                        end_line=node.end_point[0] + 1,
+                        parent_class=parent_class,
+                        symbols=[symbol],
                     )
+                    chunks.append(chunk)
+                    chunks_by_range[range_key] = chunk
+                    nodes_by_range[range_key] = node
 
-        module_level_chunk = self.extract_module_level(
+        chunks = self.split_oversized_chunks(
+            chunks, nodes_by_range, class_members, lines
+        )
+
+        if edges is not None and "import_query" in config:
+            self.extract_edges(language, root_node, symbol_nodes, edges)
+
+        chunks[:0] = self.extract_module_level(
             lines, processed_ranges, file_path, language
         )
-        if module_level_chunk:
-            chunks.insert(0, module_level_chunk)
 
         if not chunks:
             return self.fallback_chunk(content, file_path, language)
@@ -231,8 +447,23 @@ class CodeChunkService:
         if not content.strip():
             return []
 
-        chunks: list[CodeChunk] = []
-        lines = content.split("\n")
+        return list(
+            self.iter_fallback_chunks(
+                content.split("\n"), file_path, language, chunk_size, overlap
+            )
+        )
+
+    def iter_fallback_chunks(
+        self,
+        lines: Iterable[str],
+        file_path: str,
+        language: str = "unknown",
+        chunk_size: int = 1500,
+        overlap: int = 200,
+    ) -> Iterator[CodeChunk]:
+        """Size-bounded, overlapping chunks of ``lines``, produced one at a time
+        so that a large file never has to be held whole."""
+        chunk_count = 0
         current_chunk: list[str] = []
         current_size = 0
         chunk_start_line = 1
@@ -242,16 +473,15 @@ class CodeChunkService:
 
             if current_size + line_size > chunk_size and current_chunk:
                 chunk_content = "\n".join(current_chunk)
-                chunks.append(
-                    CodeChunk(
-                        content=chunk_content,
-                        chunk_type="module",
-                        name=f"chunk_{len(chunks) + 1}",
-                        file_path=file_path,
-                        language=language,
-                        start_line=chunk_start_line,
-                        end_line=chunk_start_line + len(current_chunk) - 1,
-                    )
+                chunk_count += 1
+                yield CodeChunk(
+                    content=chunk_content,
+                    chunk_type="module",
+                    name=f"chunk_{chunk_count}",
+                    file_path=file_path,
+                    language=language,
+                    start_line=chunk_start_line,
+                    end_line=chunk_start_line + len(current_chunk) - 1,
                 )
 
                 overlap_lines = []
@@ -271,72 +501,243 @@ class CodeChunkService:
 
         if current_chunk:
             chunk_content = "\n".join(current_chunk)
-            chunks.append(
-                CodeChunk(
-                    content=chunk_content,
-                    chunk_type="module",
-                    name=f"chunk_{len(chunks) + 1}",
-                    file_path=file_path,
-                    language=language,
-                    start_line=chunk_start_line,
-                    end_line=chunk_start_line + len(current_chunk) - 1,
-                )
+            yield CodeChunk(
+                content=chunk_content,
+                chunk_type="module",
+                name=f"chunk_{chunk_count + 1}",
+                file_path=file_path,
+                language=language,
+                start_line=chunk_start_line,
+                end_line=chunk_start_line + len(current_chunk) - 1,
             )
 
-        return chunks
-
     def extract_module_level(
         self,
         lines: list[str],
         processed_ranges: set[tuple[int, int]],
         file_path: str,
         language: str,
-    ) -> Optional[CodeChunk]:
-        """Extract imports, constants, and other module-level code not inside classes/functions."""
-        module_lines: list[tuple[int, str]] = []
-
+    ) -> list[CodeChunk]:
+        """Extract imports, constants, and other module-level code not inside
+        classes/functions, split into parts within the chunk budget."""
+        module_lines: NumberedLines = []
+
+        # Per-line coverage from a difference array: O(lines + ranges) instead of
+        # scanning every processed range for every line.
+        coverage = [0] * (len(lines) + 1)
+        for start, end in processed_ranges:
+            coverage[start] += 1
+            coverage[min(end, len(lines) - 1) + 1] -= 1
+
+        depth = 0
         for i, line in enumerate(lines):
-            line_in_processed = False
-            for start, end in processed_ranges:
-                if start <= i <= end:
-                    line_in_processed = True
-                    break
-
-            if not line_in_processed:
-                stripped = line.strip()
-                if stripped:
-                    module_lines.append((i, line))
+            depth += coverage[i]
+            if depth == 0 and line.strip():
+                module_lines.append((i, line))
 
         if not module_lines:
-            return None
-
-        content_lines = [line for _, line in module_lines]
-        content = "\n".join(content_lines)
+            return []
 
-        if not content.strip():
-            return None
+        return [
+            CodeChunk(
+                content="\n".join(line for _, line in part),
+                chunk_type="module",
+                name="imports_and_constants",
+                file_path=file_path,
+                language=language,
+                start_line=part[0][0] + 1,
+                end_line=part[-1][0] + 1,
+            )
+            for part in self.pack_lines([[line] for line in module_lines])
+        ]
 
-        first_line = module_lines[0][0] + 1
-        last_line = module_lines[-1][0] + 1
+    def split_oversized_chunks(
+        self,
+        chunks: list[CodeChunk],
+        nodes_by_range: dict[tuple[int, int], object],
+        class_members: dict[tuple[int, int], list[tuple]],
+        lines: list[str],
+    ) -> list[CodeChunk]:
+        """Keep every chunk within the token budget, so none is truncated by
+        the embedding model or floods a prompt when retrieved. A large class
+        becomes a skeleton of its signatures plus a chunk per method, and a
+        large function is cut between statements."""
+        result: list[CodeChunk] = []
+        for chunk in chunks:
+            if len(chunk.content) <= self.max_chunk_chars:
+                result.append(chunk)
+                continue
+
+            range_key = (chunk.start_line - 1, chunk.end_line - 1)
+            node = nodes_by_range[range_key]
+            if chunk.chunk_type == "class":
+                result.extend(
+                    self.split_class(
+                        chunk, node, class_members.get(range_key, []), lines
+                    )
+                )
+            else:
+                result.extend(self.split_function(chunk, node, lines))
+        return result
 
-        return CodeChunk(
-            content=content,
-            chunk_type="module",
-            name="imports_and_constants",
-            file_path=file_path,
-            language=language,
-            start_line=first_line,
-            end_line=last_line,
+    def split_class(
+        self, chunk: CodeChunk, node, members: list[tuple], lines: list[str]
+    ) -> list[CodeChunk]:
+        # Nested functions travel with the method around them.
+        outermost: list[tuple] = []
+        for member, symbol in sorted(
+            members,
+            key=lambda member: (member[0].start_point[0], -member[0].end_point[0]),
+        ):
+            if outermost and member.end_point[0] <= outermost[-1][0].end_point[0]:
+                continue
+            outermost.append((member, symbol))
+
+        skeleton: NumberedLines = []
+        method_chunks: list[CodeChunk] = []
+        row = node.start_point[0]
+        for member, symbol in outermost:
+            body = member.child_by_field_name("body")
+            member_start, member_end = member.start_point[0], member.end_point[0]
+            if body is None or member_start < row:
+                continue
+
+            # The signature stays; a body opening on the signature's own line
+            # (``foo() {``) is hidden from the next line on.
+            hidden_start = body.start_point[0]
+            if hidden_start == member_start:
+                hidden_start += 1
+            if hidden_start > member_end:
+                continue
+
+            signature = lines[member_start]
+            indent = signature[: len(signature) - len(signature.lstrip())]
+            skeleton.extend((i, lines[i]) for i in range(row, hidden_start))
+            skeleton.append((hidden_start, f"{indent}    ..."))
+            row = member_end + 1
+
+            method_chunks.extend(
+                self.split_function(
+                    CodeChunk(
+                        content=self.get_node_text(member, lines),
+                        chunk_type=symbol.kind,
+                        name=symbol.name,
+                        file_path=chunk.file_path,
+                        language=chunk.language,
+                        start_line=member_start + 1,
+                        end_line=member_end + 1,
+                        parent_class=symbol.qualified_name.rpartition(".")[0]
+                        or chunk.name,
+                    ),
+                    member,
+                    lines,
+                )
+            )
+        skeleton.extend((i, lines[i]) for i in range(row, node.end_point[0] + 1))
+
+        parts = self.split_lines(chunk, [[line] for line in skeleton])
+        # Placeholders stand in for the bodies, so a skeleton part can't be
+        # merged with other chunks as if it were the source itself.
+        for part in parts:
+            part.contiguous = False
+        # Skeleton parts span gaps, so methods are matched before them.
+        self.assign_symbols(chunk.symbols, [*method_chunks, *parts[1:]], parts[0])
+        return parts + method_chunks
+
+    def split_function(
+        self, chunk: CodeChunk, node, lines: list[str]
+    ) -> list[CodeChunk]:
+        if len(chunk.content) <= self.max_chunk_chars:
+            return [chunk]
+
+        # Cut before each top-level statement of the body; the signature goes
+        # with the first one and trailing lines with the last.
+        body = node.child_by_field_name("body")
+        start, end = node.start_point[0], node.end_point[0]
+        cuts = sorted(
+            {
+                statement.start_point[0]
+                for statement in (body.named_children if body else [])
+                if start < statement.start_point[0] <= end
+            }
         )
+        bounds = [start, *cuts, end + 1]
+        units = [
+            [(i, lines[i]) for i in range(unit_start, unit_end)]
+            for unit_start, unit_end in zip(bounds, bounds[1:])
+            if unit_start < unit_end
+        ]
+
+        parts = self.split_lines(chunk, units)
+        self.assign_symbols(chunk.symbols, parts, parts[0])
+        return parts
+
+    def assign_symbols(
+        self, symbols: list[Symbol], chunks: list[CodeChunk], default: CodeChunk
+    ) -> None:
+        """Give each definition to the first chunk holding its first line."""
+        for symbol in symbols:
+            owner = next(
+                (
+                    chunk
+                    for chunk in chunks
+                    if chunk.start_line <= symbol.start_line <= chunk.end_line
+                ),
+                default,
+            )
+            owner.symbols.append(symbol)
 
-    def get_node_name(self, node, captures: list, language: str) -> str:
-        for captured_node, capture_name in captures:
-            if capture_name == "name":
-                if (
-                    captured_node.start_point[0] >= node.start_point[0]
-                    and captured_node.end_point[0] <= node.end_point[0]
-                ):
-                    return captured_node.text.decode("utf-8")
+    def split_lines(
+        self, chunk: CodeChunk, units: list[NumberedLines]
+    ) -> list[CodeChunk]:
+        """Copies of ``chunk`` holding consecutive groups of ``units``, each
+        within the budget. Symbols are left for the caller to place."""
+        return [
+            CodeChunk(
+                content="\n".join(line for _, line in part),
+                chunk_type=chunk.chunk_type,
+                name=chunk.name,
+                file_path=chunk.file_path,
+                language=chunk.language,
+                start_line=part[0][0] + 1,
+                end_line=part[-1][0] + 1,
+                parent_class=chunk.parent_class,
+            )
+            for part in self.pack_lines(units)
+        ]
+
+    def pack_lines(self, units: list[NumberedLines]) -> list[NumberedLines]:
+        """Greedily group consecutive units of lines into parts within the
+        budget. A unit over the budget on its own is broken into single lines;
+        only a single line longer than the budget yields a larger part."""
+        expanded: list[NumberedLines] = []
+        for unit in units:
+            if len(unit) > 1 and self.measure(unit) > self.max_chunk_chars:
+                expanded.extend([line] for line in unit)
+            else:
+                expanded.append(unit)
+
+        parts: list[NumberedLines] = []
+        current: NumberedLines = []
+        current_size = 0
+        for unit in expanded:
+            unit_size = self.measure(unit)
+            if current and current_size + unit_size > self.max_chunk_chars:
+                parts.append(current)
+                current, current_size = [], 0
+            current.extend(unit)
+            current_size += unit_size
+        if current:
+            parts.append(current)
+        return parts
+
+    def measure(self, lines: NumberedLines) -> int:
+        return sum(len(line) + 1 for _, line in lines)
+
+    def get_node_name(self, node, names: dict[int, str], language: str) -> str:
+        name = names.get(node.id)
+        if name is not None:
+            return name
 
         if node.type == "arrow_function":
             parent = node.parent
@@ -352,14 +753,47 @@ class CodeChunkService:
         end_line = node.end_point[0]
         return "\n".join(lines[start_line : end_line + 1])
 
-    def is_inside_class(self, node, processed_ranges: set[tuple[int, int]]) -> bool:
+    def build_symbol(
+        self,
+        node,
+        name: str,
+        kind: str,
+        parent_class: Optional[str],
+        file_path: str,
+    ) -> Symbol:
+        return Symbol(
+            name=name,
+            qualified_name=f"{parent_class}.{name}" if parent_class else name,
+            kind=kind,
+            file_path=file_path,
+            start_line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+        )
+
+    def get_enclosing_range(
+        self, node, processed_ranges: set[tuple[int, int]]
+    ) -> Optional[tuple[int, int]]:
+        """The processed range of an ancestor that starts above the node and
+        ends on or below its last line, if any.
+
+        Walking up the tree replaces scanning every processed range. The end may
+        be shared: a Python class ends on the last line of its last method.
+        """
         node_start = node.start_point[0]
         node_end = node.end_point[0]
 
-        for class_start, class_end in processed_ranges:
-            if class_start < node_start and node_end < class_end:
-                return True
-        return False
+        current = node.parent
+        while current:
+            class_start = current.start_point[0]
+            class_end = current.end_point[0]
+            if (
+                class_start < node_start
+                and node_end <= class_end
+                and (class_start, class_end) in processed_ranges
+            ):
+                return (class_start, class_end)
+            current = current.parent
+        return None
 
     def find_parent_class(self, node, language: str) -> Optional[str]:
         current = node.parent
@@ -0,0 +1,239 @@
+import posixpath
+from collections import deque
+from typing import Callable, Optional
+
+from models.graph_model import CallSite, FileEdges, GraphNode
+from repositories.chroma_repository import chroma_repository
+from repositories.code_graph_repository import code_graph_repository
+from utils.contants import COLLECTION_CACHE_SIZE, DEFAULT_PROJECT
+from utils.lru_cache import LRUCache
+
+# File stems that stand for their directory when imported.
+PACKAGE_STEMS = {"__init__", "index", "mod"}
+MODULE_CALLER = "<module>"
+
+
+class CodeGraph:
+    """Import and call adjacency for one project.
+
+    Per-file edges are the source of truth; the lookup maps are rebuilt from
+    them by ``build`` because resolving an import depends on the whole file set.
+    Calls are matched by name only, so a method call links to every definition
+    with that name.
+    """
+
+    def __init__(self, files: Optional[dict[str, FileEdges]] = None):
+        self.files: dict[str, FileEdges] = dict(files or {})
+        self.build()
+
+    def replace_file(self, file_path: str, edges: FileEdges) -> None:
+        # Kept even without edges: the file can still be an import target.
+        self.files[file_path] = edges
+
+    def remove_file(self, file_path: str) -> None:
+        self.files.pop(file_path, None)
+
+    def build(self) -> None:
+        self.modules: dict[str, set[str]] = {}
+        self.stems: dict[str, str] = {}
+        for file_path in self.files:
+            self.register_module(file_path)
+
+        self.calls_by_callee: dict[str, list[tuple[str, CallSite]]] = {}
+        self.calls_by_caller: dict[str, list[tuple[str, CallSite]]] = {}
+        self.importers: dict[str, set[str]] = {}
+
+        for file_path, edges in self.files.items():
+            for call in edges.calls:
+                site = (file_path, call)
+                self.calls_by_callee.setdefault(call.callee.lower(), []).append(site)
+                for key in self.get_caller_keys(file_path, call.caller):
+                    self.calls_by_caller.setdefault(key, []).append(site)
+
+            for specifier in edges.imports:
+                for target in self.resolve_import(file_path, edges.language, specifier):
+                    self.importers.setdefault(target, set()).add(file_path)
+
+    def register_module(self, file_path: str) -> None:
+        """Index a file under every trailing part of its path, so ``a.b.c``,
+        ``b/c`` and ``./c`` style imports can all find ``src/a/b/c.py``."""
+        stem = posixpath.splitext(file_path)[0]
+        self.stems[stem] = file_path
+
+        parts = stem.split("/")
+        if len(parts) > 1 and parts[-1] in PACKAGE_STEMS:
+            parts = parts[:-1]
+            self.stems.setdefault("/".join(parts), file_path)
+        for i in range(len(parts)):
+            self.modules.setdefault("/".join(parts[i:]), set()).add(file_path)
+
+    def get_caller_keys(self, file_path: str, caller: str) -> list[str]:
+        if not caller:
+            return [file_path.lower()]
+        keys = [caller.lower()]
+        if "." in caller:
+            keys.append(caller.rsplit(".", 1)[1].lower())
+        return keys
+
+    def resolve_import(
+        self, file_path: str, language: str, specifier: str
+    ) -> list[str]:
+        """Indexed files an import refers to, or the specifier itself when it
+        names something outside the project (a package, the standard library)."""
+        if specifier.startswith("."):
+            if language == "python":
+                stripped = specifier.lstrip(".")
+                base = posixpath.dirname(file_path)
+                for _ in range(len(specifier) - len(stripped) - 1):
+                    base = posixpath.dirname(base)
+                key = posixpath.join(base, stripped.replace(".", "/"))
+            else:
+                key = posixpath.normpath(
+                    posixpath.join(posixpath.dirname(file_path), specifier)
+                )
+                key = posixpath.splitext(key)[0]
+            target = self.stems.get(key.strip("/"))
+            return [target] if target else [specifier]
+
+        key = self.get_module_key(language, specifier)
+        targets = self.modules.get(key)
+        return sorted(targets) if targets else [specifier]
+
+    def get_module_key(self, language: str, specifier: str) -> str:
+        if language in ("python", "java"):
+            return specifier.replace(".", "/")
+        if language == "rust":
+            parts = specifier.split("::")
+            while parts and parts[0] in ("crate", "self", "super"):
+                parts = parts[1:]
+            return "/".join(parts)
+        if language in ("c", "cpp"):
+            return posixpath.splitext(specifier)[0]
+        return specifier
+
+    def match_import_targets(self, module: str) -> list[str]:
+        """Import targets named by a file path, dotted module or package name.
+        Submodules of a package count as the package."""
+        module = module.strip().strip("`'\"")
+        key = posixpath.splitext(module)[0] if "/" in module else module
+        key = key.replace("::", "/").replace(".", "/")
+
+        targets = set(self.modules.get(key, ()))
+        for target in self.importers:
+            if target == module or target.startswith(
+                (f"{module}.", f"{module}/", f"{module}::")
+            ):
+                targets.add(target)
+        return sorted(target for target in targets if target in self.importers)
+
+    def find_callers(self, name: str, hops: int, limit: int) -> list[GraphNode]:
+        return self.traverse(
+            [name],
+            hops,
+            limit,
+            lambda current: [
+                (call.caller, file_path, call.line)
+                for file_path, call in self.calls_by_callee.get(
+                    current.rsplit(".", 1)[-1].lower(), []
+                )
+            ],
+        )
+
+    def find_callees(self, name: str, hops: int, limit: int) -> list[GraphNode]:
+        return self.traverse(
+            [name],
+            hops,
+            limit,
+            lambda current: [
+                (call.callee, file_path, call.line)
+                for file_path, call in self.calls_by_caller.get(current.lower(), [])
+            ],
+        )
+
+    def find_importers(self, module: str, hops: int, limit: int) -> list[GraphNode]:
+        return self.traverse(
+            self.match_import_targets(module),
+            hops,
+            limit,
+            lambda current: [
+                (file_path, file_path, 0)
+                for file_path in sorted(self.importers.get(current, ()))
+            ],
+        )
+
+    def traverse(
+        self,
+        start: list[str],
+        hops: int,
+        limit: int,
+        neighbours: Callable[[str], list[tuple[str, str, int]]],
+    ) -> list[GraphNode]:
+        """Breadth-first walk up to ``hops`` steps from ``start``. ``neighbours``
+        maps a node name to (name, file_path, line) tuples; an empty name marks
+        module-level code, which is reported but not expanded."""
+        nodes: list[GraphNode] = []
+        seen: set[tuple[str, str]] = set()
+        queue = deque((name, 0) for name in start)
+        expanded = set(start)
+
+        while queue and len(nodes) < limit:
+            current, hop = queue.popleft()
+            if hop >= hops:
+                continue
+
+            for name, file_path, line in neighbours(current):
+                key = (name or MODULE_CALLER, file_path)
+                if key in seen:
+                    continue
+                seen.add(key)
+                nodes.append(
+                    GraphNode(
+                        name=name or MODULE_CALLER,
+                        file_path=file_path,
+                        line=line,
+                        hop=hop + 1,
+                    )
+                )
+                if len(nodes) >= limit:
+                    break
+                if name and name not in expanded:
+                    expanded.add(name)
+                    queue.append((name, hop + 1))
+
+        return nodes
+
+
+class CodeGraphService:
+    """Loads, updates and persists each project's code graph.
+
+    Uploads edit a private copy that is rebuilt and swapped in when they
+    finish, like the lexical index and symbol table.
+    """
+
+    def __init__(self, cache_size: int = COLLECTION_CACHE_SIZE):
+        self.graphs: LRUCache[CodeGraph] = LRUCache(cache_size)
+        chroma_repository.add_generation_listener(self.graphs.pop)
+
+    def get_graph(self, project: str = DEFAULT_PROJECT) -> CodeGraph:
+        # Drops the cached copy first if another process changed the project.
+        chroma_repository.get_generation(project)
+        name = chroma_repository.get_collection_name(project)
+        return self.graphs.get_or_create(name, lambda: self.load(project))
+
+    def load(self, project: str = DEFAULT_PROJECT) -> CodeGraph:
+        name = chroma_repository.get_collection_name(project)
+        return CodeGraph(code_graph_repository.load(name))
+
+    def begin_update(
+        self, project: str = DEFAULT_PROJECT, clear: bool = False
+    ) -> CodeGraph:
+        return CodeGraph() if clear else self.load(project)
+
+    def commit(self, project: str, graph: CodeGraph) -> None:
+        graph.build()
+        name = chroma_repository.get_collection_name(project)
+        code_graph_repository.save(name, graph.files)
+        self.graphs.put(name, graph)
+
+
+code_graph_service = CodeGraphService()
@@ -0,0 +1,298 @@
+import heapq
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Optional
+
+from models.lexical_model import LexicalDocument
+from repositories.chroma_repository import chroma_repository
+from repositories.lexical_index_repository import lexical_index_repository
+from utils.contants import COLLECTION_CACHE_SIZE, DEFAULT_PROJECT
+from utils.lru_cache import LRUCache
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+WORD_PART_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+SYMBOL_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?")
+BACKTICK_PATTERN = re.compile(r"`([^`]+)`")
+# A capital after a lowercase letter or digit, as in camelCase or PascalCase.
+IDENTIFIER_CASE_PATTERN = re.compile(r"[a-z0-9][A-Z]")
+
+# Question words that say nothing about the code being searched for.
+STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "be",
+        "by",
+        "do",
+        "does",
+        "for",
+        "how",
+        "in",
+        "is",
+        "it",
+        "of",
+        "on",
+        "or",
+        "the",
+        "this",
+        "that",
+        "to",
+        "what",
+        "where",
+        "which",
+        "who",
+        "why",
+        "with",
+    }
+)
+
+# Chunk metadata kept alongside the term counts so search filters can be applied
+# without asking Chroma.
+FILTER_FIELDS = (
+    "name",
+    "parent_class",
+    "language",
+    "chunk_type",
+    "extension",
+    "directory",
+)
+
+
+@lru_cache(maxsize=65536)
+def split_identifier(identifier: str) -> tuple[str, ...]:
+    """The identifier itself plus its snake_case and camelCase parts, lowercased."""
+    tokens = [identifier.lower()]
+    parts = WORD_PART_PATTERN.findall(identifier)
+    if len(parts) > 1:
+        tokens.extend(part.lower() for part in parts)
+    return tuple(token for token in tokens if len(token) > 1 and token not in STOPWORDS)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        tokens.extend(split_identifier(identifier))
+    return tokens
+
+
+def extract_symbols(query_text: str) -> list[str]:
+    """Symbols named by a query: its `backticked` spans, or the whole query when
+    it is a bare identifier such as ``get_node_name`` or ``Class.method``."""
+    spans = BACKTICK_PATTERN.findall(query_text) or [query_text]
+    symbols = []
+    for span in spans:
+        symbol = span.strip().removesuffix("()")
+        if SYMBOL_PATTERN.fullmatch(symbol):
+            symbols.append(symbol.lower())
+    return symbols
+
+
+def is_symbol_query(query_text: str) -> bool:
+    """Whether the query is written as an identifier: backticked, called, or
+    containing an underscore, a dot or an inner capital. A single plain word
+    such as "authentication" is a concept, not a symbol."""
+    query_text = query_text.strip()
+    symbol = query_text.strip("`").strip().removesuffix("()")
+    if SYMBOL_PATTERN.fullmatch(symbol) is None:
+        return False
+    return (
+        query_text.startswith("`")
+        or query_text.endswith("()")
+        or "_" in symbol
+        or "." in symbol
+        or IDENTIFIER_CASE_PATTERN.search(symbol) is not None
+    )
+
+
+class LexicalIndex:
+    """In-memory inverted index over chunk identifiers, scored with BM25.
+
+    Chunk names are weighted above body text, and exact symbol names map
+    straight to their chunks so symbol lookups skip scoring altogether.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    NAME_WEIGHT = 3
+
+    def __init__(self, documents: Optional[dict[str, LexicalDocument]] = None):
+        self.documents: dict[str, LexicalDocument] = {}
+        self.postings: dict[str, dict[str, int]] = {}
+        self.files: dict[str, set[str]] = {}
+        self.symbols: dict[str, set[str]] = {}
+        self.total_length = 0
+
+        for chunk_id, document in (documents or {}).items():
+            self.insert(chunk_id, document)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, chunk_id: str, document: str, metadata: dict) -> None:
+        terms = Counter(tokenize(document))
+        for token in tokenize(metadata.get("name") or ""):
+            terms[token] += self.NAME_WEIGHT
+
+        self.remove(chunk_id)
+        self.insert(
+            chunk_id,
+            LexicalDocument(
+                file_path=metadata["file_path"],
+                length=sum(terms.values()),
+                terms=dict(terms),
+                metadata={
+                    field: str(metadata.get(field) or "") for field in FILTER_FIELDS
+                },
+            ),
+        )
+
+    def insert(self, chunk_id: str, document: LexicalDocument) -> None:
+        self.documents[chunk_id] = document
+        self.total_length += document.length
+        self.files.setdefault(document.file_path, set()).add(chunk_id)
+
+        for term, count in document.terms.items():
+            self.postings.setdefault(term, {})[chunk_id] = count
+
+        for symbol in self.get_symbol_keys(document):
+            self.symbols.setdefault(symbol, set()).add(chunk_id)
+
+    def remove(self, chunk_id: str) -> None:
+        document = self.documents.pop(chunk_id, None)
+        if document is None:
+            return
+
+        self.total_length -= document.length
+        self.discard(self.files, document.file_path, chunk_id)
+        for term in document.terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+        for symbol in self.get_symbol_keys(document):
+            self.discard(self.symbols, symbol, chunk_id)
+
+    def remove_file(self, file_path: str) -> None:
+        for chunk_id in list(self.files.get(file_path, ())):
+            self.remove(chunk_id)
+
+    def discard(self, mapping: dict[str, set[str]], key: str, chunk_id: str) -> None:
+        chunk_ids = mapping.get(key)
+        if chunk_ids is not None:
+            chunk_ids.discard(chunk_id)
+            if not chunk_ids:
+                del mapping[key]
+
+    def get_symbol_keys(self, document: LexicalDocument) -> list[str]:
+        name = document.metadata.get("name", "").lower()
+        if not name:
+            return []
+        parent_class = document.metadata.get("parent_class", "").lower()
+        return [name, f"{parent_class}.{name}"] if parent_class else [name]
+
+    def lookup_symbols(
+        self,
+        query_text: str,
+        accept: Optional[Callable[[LexicalDocument], bool]] = None,
+    ) -> list[str]:
+        chunk_ids: list[str] = []
+        for symbol in extract_symbols(query_text):
+            chunk_ids.extend(sorted(self.symbols.get(symbol, ())))
+
+        if accept is not None:
+            chunk_ids = [
+                chunk_id for chunk_id in chunk_ids if accept(self.documents[chunk_id])
+            ]
+        return list(dict.fromkeys(chunk_ids))
+
+    def search(
+        self,
+        query_text: str,
+        limit: int,
+        accept: Optional[Callable[[LexicalDocument], bool]] = None,
+    ) -> list[str]:
+        """Chunk ids ranked by BM25 against the query's tokens."""
+        if not self.documents:
+            return []
+
+        total = len(self.documents)
+        average_length = self.total_length / total
+        scores: dict[str, float] = {}
+
+        for term in set(tokenize(query_text)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings.items():
+                length_norm = (
+                    1
+                    - self.B
+                    + self.B * (self.documents[chunk_id].length / average_length)
+                )
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * (
+                    count * (self.K1 + 1) / (count + self.K1 * length_norm)
+                )
+
+        if accept is not None:
+            scores = {
+                chunk_id: score
+                for chunk_id, score in scores.items()
+                if accept(self.documents[chunk_id])
+            }
+        return heapq.nlargest(limit, scores, key=scores.__getitem__)
+
+
+class LexicalIndexService:
+    """Loads, updates and persists each project's lexical index.
+
+    Uploads build a private copy and swap it in when they finish, so queries
+    never read an index that is being modified.
+    """
+
+    def __init__(self, cache_size: int = COLLECTION_CACHE_SIZE):
+        self.indexes: LRUCache[LexicalIndex] = LRUCache(cache_size)
+        chroma_repository.add_generation_listener(self.indexes.pop)
+
+    def get_index(self, project: str = DEFAULT_PROJECT) -> LexicalIndex:
+        # Drops the cached copy first if another process changed the project.
+        chroma_repository.get_generation(project)
+        name = chroma_repository.get_collection_name(project)
+        return self.indexes.get_or_create(name, lambda: self.load(project))
+
+    def load(self, project: str = DEFAULT_PROJECT) -> LexicalIndex:
+        name = chroma_repository.get_collection_name(project)
+        documents = lexical_index_repository.load(name)
+        if documents is not None:
+            return LexicalIndex(documents)
+
+        # Collections indexed before the lexical index existed are rebuilt from
+        # the chunks already stored in Chroma.
+        index = LexicalIndex()
+        stored = chroma_repository.get_documents(project)
+        for chunk_id, document, metadata in zip(
+            stored["ids"], stored["documents"] or [], stored["metadatas"] or []
+        ):
+            index.add(chunk_id, document, metadata)
+        if len(index) and not chroma_repository.read_only:
+            lexical_index_repository.save(name, index.documents)
+        return index
+
+    def begin_update(
+        self, project: str = DEFAULT_PROJECT, clear: bool = False
+    ) -> LexicalIndex:
+        return LexicalIndex() if clear else self.load(project)
+
+    def commit(self, project: str, index: LexicalIndex) -> None:
+        name = chroma_repository.get_collection_name(project)
+        lexical_index_repository.save(name, index.documents)
+        self.indexes.put(name, index)
+
+
+lexical_index_service = LexicalIndexService()
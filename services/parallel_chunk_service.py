@@ -0,0 +1,113 @@
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator
+
+from models.code_chunk_model import CodeChunk
+from models.graph_model import FileEdges
+from services.code_chunk_service import code_chunk_service
+from services.spooled_file import SpooledFile
+from utils.contants import CHUNK_WORKERS
+
+# A large file's chunks come as a generator that must be consumed before the
+# next result is requested.
+ChunkedFile = tuple[Iterable[CodeChunk], FileEdges]
+ChunkResult = tuple[str, ChunkedFile | Exception]
+
+
+def chunk_in_worker(content: str, file_path: str) -> ChunkedFile:
+    # Runs in a spawned worker, so code_chunk_service (and its parsers) is the
+    # worker's own instance.
+    edges = FileEdges(file_path)
+    return code_chunk_service.chunk_code(content, file_path, edges), edges
+
+
+def iter_spooled_chunks(file: SpooledFile, file_path: str) -> Iterator[CodeChunk]:
+    # Too large to parse: fixed-size line chunks straight from the mapped file.
+    try:
+        language = code_chunk_service.get_language_from_extension(file_path)
+        yield from code_chunk_service.iter_fallback_chunks(
+            file.iter_lines(), file_path, language or "unknown"
+        )
+    finally:
+        file.close()
+
+
+def chunk_spooled_file(file: SpooledFile, file_path: str) -> Future:
+    # Chunked lazily in this process as the result is consumed, so the file is
+    # never pickled to a worker or held as one string.
+    future: Future = Future()
+    future.set_result((iter_spooled_chunks(file, file_path), FileEdges(file_path)))
+    return future
+
+
+class ParallelChunkService:
+    IN_FLIGHT_PER_WORKER = 4
+
+    def __init__(self, workers: int = CHUNK_WORKERS):
+        self.workers = max(1, workers)
+        self.executor: ProcessPoolExecutor | None = None
+        self.lock = threading.Lock()
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.executor
+
+    def reset_executor(self) -> None:
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def chunk_files(
+        self, files: Iterable[tuple[str, str | SpooledFile]]
+    ) -> Iterator[ChunkResult]:
+        """Chunk (file_path, content) pairs, yielding each file's chunks and graph
+        edges (or the exception that stopped it) in input order."""
+        if self.workers == 1:
+            for file_path, content in files:
+                if isinstance(content, SpooledFile):
+                    yield self.collect(
+                        file_path, chunk_spooled_file(content, file_path)
+                    )
+                    continue
+                try:
+                    yield file_path, chunk_in_worker(content, file_path)
+                except Exception as e:
+                    yield file_path, e
+            return
+
+        executor = self.get_executor()
+        window = self.workers * self.IN_FLIGHT_PER_WORKER
+        in_flight: deque[tuple[str, Future]] = deque()
+
+        for file_path, content in files:
+            if isinstance(content, SpooledFile):
+                future = chunk_spooled_file(content, file_path)
+            else:
+                future = executor.submit(chunk_in_worker, content, file_path)
+            in_flight.append((file_path, future))
+            if len(in_flight) >= window:
+                yield self.collect(*in_flight.popleft())
+
+        while in_flight:
+            yield self.collect(*in_flight.popleft())
+
+    def collect(self, file_path: str, future: Future) -> ChunkResult:
+        try:
+            return file_path, future.result()
+        except BrokenProcessPool as e:
+            self.reset_executor()
+            return file_path, e
+        except Exception as e:
+            return file_path, e
+
+
+parallel_chunk_service = ParallelChunkService()
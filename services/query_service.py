@@ -1,17 +1,44 @@
-from langchain_core.messages import HumanMessage, AIMessage
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator
 
-from langgraph_agent.graph import agent
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+
+from models.query_model import QueryStreamEvent
+from models.trace_model import QueryTrace
+from services.startup_service import startup_service
+from services.trace_service import trace_service
+from utils.contants import DEFAULT_PROJECT
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
 
 
 class QueryService:
-    def ask_agent(self, query: str) -> str:
-        initial_state = {
+    def __init__(self):
+        # Compiled on the first query: building the graph imports langgraph,
+        # the tools and everything they use, which would otherwise be paid by
+        # every process at start-up.
+        self.agent: "CompiledStateGraph | None" = None
+        self.agent_lock = threading.Lock()
+
+    def get_agent(self) -> "CompiledStateGraph":
+        if self.agent is None:
+            with self.agent_lock:
+                if self.agent is None:
+                    with startup_service.measure("agent_graph"):
+                        from langgraph_agent.graph import agent
+
+                    self.agent = agent
+        return self.agent
+
+    def build_initial_state(self, query: str, project: str) -> dict:
+        return {
             "messages": [HumanMessage(content=query)],
+            "project": project,
         }
 
-        final_state = agent.invoke(initial_state)
-        last_message = final_state["messages"][-1]
-
+    def format_answer(self, last_message) -> str:
         if isinstance(last_message, AIMessage):
             html_content = last_message.content
         else:
@@ -19,5 +46,105 @@ class QueryService:
 
         return f'<div class="codebase-answer">{html_content}</div>'
 
+    def ask_agent(
+        self, query: str, project: str = DEFAULT_PROJECT
+    ) -> tuple[str, QueryTrace]:
+        initial_state = self.build_initial_state(query, project)
+
+        with trace_service.trace(query, project) as trace:
+            final_state = self.get_agent().invoke(initial_state)
+        return self.format_answer(final_state["messages"][-1]), trace
+
+    def stream_agent(
+        self, query: str, project: str = DEFAULT_PROJECT, debug: bool = False
+    ) -> Iterator[QueryStreamEvent]:
+        """Run the agent and yield events as they happen: tool calls starting and
+        finishing (with the files they retrieved), answer tokens, and the final
+        answer."""
+        yield QueryStreamEvent("start", {"question": query, "project": project})
+
+        with trace_service.trace(query, project) as trace:
+            yield from self.stream_events(query, project)
+
+        yield QueryStreamEvent("done", {"debug": trace.to_dict()} if debug else {})
+
+    def stream_events(self, query: str, project: str) -> Iterator[QueryStreamEvent]:
+        initial_state = self.build_initial_state(query, project)
+        pending_tools: dict[str, tuple[str, float]] = {}
+        references: list[str] = []
+        last_message = None
+
+        try:
+            agent = self.get_agent()
+            # Already imported along with the graph.
+            from langgraph_agent.tools import extract_file_references
+
+            for mode, chunk in agent.stream(
+                initial_state, stream_mode=["updates", "messages"]
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if (
+                        isinstance(message, AIMessageChunk)
+                        and metadata.get("langgraph_node") == "agent"
+                        and isinstance(message.content, str)
+                        and message.content
+                    ):
+                        yield QueryStreamEvent("token", {"text": message.content})
+                    continue
+
+                for node, update in chunk.items():
+                    if node == "agent":
+                        last_message = update["messages"][-1]
+                        for tool_call in getattr(last_message, "tool_calls", []):
+                            pending_tools[tool_call["id"]] = (
+                                tool_call["name"],
+                                time.perf_counter(),
+                            )
+                            yield QueryStreamEvent(
+                                "tool_start",
+                                {
+                                    "id": tool_call["id"],
+                                    "name": tool_call["name"],
+                                    "args": tool_call["args"],
+                                    "iteration": update.get("iteration_count", 0),
+                                },
+                            )
+
+                    elif node == "tools":
+                        for message in update["messages"]:
+                            if not isinstance(message, ToolMessage):
+                                continue
+                            if message.tool_call_id not in pending_tools:
+                                continue
+
+                            name, started = pending_tools.pop(message.tool_call_id)
+                            files = extract_file_references(str(message.content))
+                            references.extend(
+                                path for path in files if path not in references
+                            )
+                            yield QueryStreamEvent(
+                                "tool_end",
+                                {
+                                    "id": message.tool_call_id,
+                                    "name": name,
+                                    "duration_ms": round(
+                                        (time.perf_counter() - started) * 1000, 2
+                                    ),
+                                    "references": files,
+                                },
+                            )
+
+            yield QueryStreamEvent(
+                "answer",
+                {
+                    "answer_html": self.format_answer(last_message),
+                    "references": references,
+                },
+            )
+
+        except Exception as e:
+            yield QueryStreamEvent("error", {"message": str(e)})
+
 
 query_service = QueryService()
@@ -0,0 +1,225 @@
+import posixpath
+from typing import TYPE_CHECKING
+
+from models.chroma_model import RetrievalCacheStats, RetrievalMode, SearchFilters
+from repositories.chroma_repository import chroma_repository
+from repositories.manifest_repository import manifest_repository
+from services.lexical_index_service import is_symbol_query, lexical_index_service
+from services.trace_service import trace_service
+from utils.contants import (
+    DEFAULT_PROJECT,
+    RETRIEVAL_CACHE_SIZE,
+    RETRIEVAL_CACHE_TTL_SECONDS,
+    RETRIEVAL_MODE,
+)
+from utils.lru_cache import LRUCache
+
+if TYPE_CHECKING:
+    from chromadb import QueryResult
+
+
+class RetrievalService:
+    """Searches a project for the agent tools and caches the results.
+
+    Hybrid searches fuse the vector ranking with the BM25 ranking from the
+    lexical index. Keys include the project's index generation, so an upload
+    makes every earlier result for that project unreachable without an explicit
+    purge.
+    """
+
+    RRF_K = 60
+
+    def __init__(
+        self,
+        cache_size: int = RETRIEVAL_CACHE_SIZE,
+        ttl_seconds: float = RETRIEVAL_CACHE_TTL_SECONDS,
+    ):
+        self.cache: "LRUCache[QueryResult]" = LRUCache(cache_size, ttl_seconds)
+        # Directory listings back path prefix filters, one per project index.
+        self.directories: LRUCache[list[str]] = LRUCache(cache_size)
+
+    def normalize_query(self, query_text: str) -> str:
+        return " ".join(query_text.lower().split())
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        project: str = DEFAULT_PROJECT,
+        filters: SearchFilters | None = None,
+        mode: RetrievalMode | None = None,
+    ) -> "QueryResult":
+        filters = filters or SearchFilters()
+        mode = mode or RetrievalMode(RETRIEVAL_MODE)
+        key = (
+            chroma_repository.get_collection_name(project),
+            chroma_repository.get_generation(project),
+            self.normalize_query(query_text),
+            n_results,
+            filters,
+            mode,
+        )
+
+        with trace_service.step("retrieval", "cache", n_results=n_results) as step:
+            results = self.cache.get(key)
+            if results is None:
+                step.name = mode.value
+                results = self.search(query_text, n_results, project, filters, mode)
+                self.cache.put(key, results)
+
+            step.details["result_count"] = len((results.get("ids") or [[]])[0])
+            return results
+
+    def search(
+        self,
+        query_text: str,
+        n_results: int,
+        project: str,
+        filters: SearchFilters,
+        mode: RetrievalMode,
+    ) -> "QueryResult":
+        directories = None
+        if filters.path_prefix:
+            directories = self.match_directories(project, filters.path_prefix)
+            if directories is not None and not directories:
+                empty: "QueryResult" = {
+                    "ids": [[]],
+                    "documents": [[]],
+                    "metadatas": [[]],
+                    "distances": [[]],
+                }
+                return empty
+
+        # The lexical index doesn't hold chunk text, so substring filters can
+        # only be applied by Chroma.
+        if mode is RetrievalMode.VECTOR or filters.contains:
+            return self.vector_search(
+                query_text, n_results, project, filters, directories
+            )
+
+        index = lexical_index_service.get_index(project)
+        accept = None
+        if filters != SearchFilters() or directories is not None:
+            allowed = set(directories) if directories is not None else None
+            accept = lambda document: filters.matches(document.metadata, allowed)
+
+        symbol_ids = index.lookup_symbols(query_text, accept)
+        lexical_ids = index.search(query_text, n_results * 2, accept)
+        if symbol_ids or (is_symbol_query(query_text) and lexical_ids):
+            # A definition's exact name, or an identifier, is answered by the
+            # chunks that name it; embedding similarity only adds noise (and
+            # latency) here. One-word concepts still need the embeddings.
+            mode = RetrievalMode.LEXICAL
+
+        if mode is RetrievalMode.LEXICAL:
+            ranked = list(dict.fromkeys(symbol_ids + lexical_ids))[:n_results]
+            return self.merge_results(ranked, None, project)
+
+        vector_results = self.vector_search(
+            query_text, n_results * 2, project, filters, directories
+        )
+        fused = self.fuse_rankings([vector_results["ids"][0], lexical_ids])
+        ranked = list(dict.fromkeys(symbol_ids + fused))[:n_results]
+        return self.merge_results(ranked, vector_results, project)
+
+    def vector_search(
+        self,
+        query_text: str,
+        n_results: int,
+        project: str,
+        filters: SearchFilters,
+        directories: list[str] | None,
+    ) -> "QueryResult":
+        return chroma_repository.query(
+            query_text,
+            n_results=n_results,
+            project=project,
+            where=filters.to_where(directories),
+            where_document=filters.to_where_document(),
+        )
+
+    def fuse_rankings(self, rankings: list[list[str]]) -> list[str]:
+        """Reciprocal rank fusion: score each id by the sum of 1 / (k + rank)."""
+        scores: dict[str, float] = {}
+        for ranking in rankings:
+            for rank, chunk_id in enumerate(ranking, start=1):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (self.RRF_K + rank)
+        return sorted(scores, key=scores.__getitem__, reverse=True)
+
+    def merge_results(
+        self,
+        ranked_ids: list[str],
+        vector_results: "QueryResult | None",
+        project: str,
+    ) -> "QueryResult":
+        """Build a result in ``ranked_ids`` order, fetching from Chroma only the
+        chunks the vector search didn't already return."""
+        documents: dict[str, str] = {}
+        metadatas: dict[str, dict] = {}
+        if vector_results is not None:
+            for chunk_id, document, metadata in zip(
+                vector_results["ids"][0],
+                vector_results["documents"][0],
+                vector_results["metadatas"][0],
+            ):
+                documents[chunk_id] = document
+                metadatas[chunk_id] = metadata
+
+        missing = [chunk_id for chunk_id in ranked_ids if chunk_id not in documents]
+        if missing:
+            stored = chroma_repository.get_by_ids(missing, project)
+            for chunk_id, document, metadata in zip(
+                stored["ids"], stored["documents"], stored["metadatas"]
+            ):
+                documents[chunk_id] = document
+                metadatas[chunk_id] = metadata
+
+        # Ids whose chunks have since been deleted are dropped.
+        ids = [chunk_id for chunk_id in ranked_ids if chunk_id in documents]
+        fused: "QueryResult" = {
+            "ids": [ids],
+            "documents": [[documents[chunk_id] for chunk_id in ids]],
+            "metadatas": [[metadatas[chunk_id] for chunk_id in ids]],
+        }
+        return fused
+
+    def match_directories(self, project: str, path_prefix: str) -> list[str] | None:
+        """Indexed directories at or below ``path_prefix``, or None for the root."""
+        # "/", "." and "./" all name the root, and "./src/" names "src".
+        prefix = posixpath.normpath(f"/{path_prefix.strip()}").strip("/")
+        if not prefix:
+            return None
+
+        directories = self.get_directories(project)
+        return [
+            directory
+            for directory in directories
+            if directory == prefix or directory.startswith(f"{prefix}/")
+        ]
+
+    def get_directories(self, project: str) -> list[str]:
+        collection_name = chroma_repository.get_collection_name(project)
+        key = (collection_name, chroma_repository.get_generation(project))
+
+        return self.directories.get_or_create(
+            key,
+            lambda: sorted(
+                {
+                    posixpath.dirname(file_path)
+                    for file_path in manifest_repository.load(collection_name)
+                }
+            ),
+        )
+
+    def get_cache_stats(self) -> RetrievalCacheStats:
+        return RetrievalCacheStats(
+            hits=self.cache.hits,
+            misses=self.cache.misses,
+            evictions=self.cache.evictions,
+            size=len(self.cache),
+            max_size=self.cache.max_size,
+            ttl_seconds=self.cache.ttl_seconds,
+        )
+
+
+retrieval_service = RetrievalService()
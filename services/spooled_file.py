@@ -0,0 +1,72 @@
+import codecs
+import hashlib
+import mmap
+import tempfile
+from typing import Iterator
+
+
+class SpooledFile:
+    """A large file copied to a temporary file on disk and memory-mapped, so it
+    is never held in memory as a whole. Its content hash is computed while it
+    is copied.
+
+    It is decoded the way a small file's text is, as UTF-8 with invalid bytes
+    dropped, so the same content gets the same hash and lines at any size."""
+
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.hash = hashlib.sha256()
+        # Hashes the decoded text rather than the raw bytes; the decoder carries
+        # a character split across two writes over to the next.
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.size = 0
+        self.map: mmap.mmap | None = None
+
+    @property
+    def digest(self) -> str:
+        return self.hash.hexdigest()
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.hash.update(self.decoder.decode(data).encode("utf-8"))
+        self.size += len(data)
+
+    def get_map(self) -> mmap.mmap:
+        if self.map is None:
+            self.file.flush()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self.map, "madvise"):
+                self.map.madvise(mmap.MADV_SEQUENTIAL)
+        return self.map
+
+    def is_blank(self) -> bool:
+        if not self.size:
+            return True
+        data = self.get_map()
+        return not any(
+            data[start : start + self.BLOCK_SIZE].strip()
+            for start in range(0, self.size, self.BLOCK_SIZE)
+        )
+
+    def iter_lines(self) -> Iterator[str]:
+        """The decoded lines, as ``content.split("\\n")`` would return them, found
+        by their offsets in the mapped file and decoded one at a time. No UTF-8
+        sequence contains a newline byte, so this drops the same invalid bytes
+        as decoding the whole file."""
+        data = self.get_map()
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end == -1:
+                yield data[start:].decode("utf-8", errors="ignore")
+                return
+            yield data[start:end].decode("utf-8", errors="ignore")
+            start = end + 1
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
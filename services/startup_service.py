@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from models.startup_model import StartupReport
+
+
+def get_process_age() -> float:
+    """Seconds since this process started, where the OS reports it (Linux);
+    otherwise 0, so timings start at this module's import."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            # The command name may contain spaces; fields resume after ")".
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        start_ticks = int(fields[19])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+class StartupService:
+    """Start-up timings: how long the process took to become ready, and what
+    each expensive component (grammars, the Chroma client, the LLM, the agent
+    graph) cost when it was first used."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter() - get_process_age()
+        self.ready_ms: float | None = None
+        self.components: dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, component: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+            with self.lock:
+                self.components[component] = elapsed_ms
+
+    def mark_ready(self) -> float:
+        self.ready_ms = round((time.perf_counter() - self.started_at) * 1000, 2)
+        return self.ready_ms
+
+    def get_report(self) -> StartupReport:
+        with self.lock:
+            return StartupReport(
+                ready_ms=self.ready_ms, components=dict(self.components)
+            )
+
+
+startup_service = StartupService()
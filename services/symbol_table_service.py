@@ -0,0 +1,110 @@
+from typing import Optional
+
+from models.symbol_model import Symbol
+from repositories.chroma_repository import chroma_repository
+from repositories.symbol_table_repository import symbol_table_repository
+from utils.contants import COLLECTION_CACHE_SIZE, DEFAULT_PROJECT
+from utils.lru_cache import LRUCache
+
+KIND_ORDER = {"class": 0, "function": 1, "method": 2}
+
+
+class SymbolTable:
+    """Definitions by qualified name (``Class.method``) and by bare name."""
+
+    def __init__(self, files: Optional[dict[str, list[Symbol]]] = None):
+        self.files: dict[str, list[Symbol]] = {}
+        self.qualified: dict[str, list[Symbol]] = {}
+        self.names: dict[str, list[Symbol]] = {}
+
+        for file_path, symbols in (files or {}).items():
+            self.replace_file(file_path, symbols)
+
+    def __len__(self) -> int:
+        return sum(len(symbols) for symbols in self.files.values())
+
+    def replace_file(self, file_path: str, symbols: list[Symbol]) -> None:
+        self.remove_file(file_path)
+        if not symbols:
+            return
+
+        self.files[file_path] = symbols
+        for symbol in symbols:
+            self.qualified.setdefault(symbol.qualified_name.lower(), []).append(symbol)
+            self.names.setdefault(symbol.name.lower(), []).append(symbol)
+
+    def remove_file(self, file_path: str) -> None:
+        for symbol in self.files.pop(file_path, []):
+            self.discard(self.qualified, symbol.qualified_name.lower(), symbol)
+            self.discard(self.names, symbol.name.lower(), symbol)
+
+    def discard(
+        self, mapping: dict[str, list[Symbol]], key: str, symbol: Symbol
+    ) -> None:
+        symbols = [other for other in mapping.get(key, []) if other is not symbol]
+        if symbols:
+            mapping[key] = symbols
+        else:
+            mapping.pop(key, None)
+
+    def lookup(self, name: str) -> list[Symbol]:
+        """Definitions matching a qualified name, a trailing part of one (e.g.
+        ``Service.method`` for ``module.Service.method``), or a bare name."""
+        key = name.strip().strip("`").strip().removesuffix("()").lower()
+        if not key:
+            return []
+
+        matches = self.qualified.get(key)
+        if not matches and "." in key:
+            matches = [
+                symbol
+                for symbol in self.names.get(key.rsplit(".", 1)[1], [])
+                if f".{symbol.qualified_name.lower()}".endswith(f".{key}")
+                or key.endswith(f".{symbol.qualified_name.lower()}")
+            ]
+        if not matches:
+            matches = self.names.get(key, [])
+
+        return sorted(
+            matches,
+            key=lambda symbol: (
+                KIND_ORDER.get(symbol.kind, len(KIND_ORDER)),
+                symbol.file_path,
+                symbol.start_line,
+            ),
+        )
+
+
+class SymbolTableService:
+    """Loads, updates and persists each project's symbol table.
+
+    Like the lexical index, uploads update a private copy that replaces the
+    served table when they finish.
+    """
+
+    def __init__(self, cache_size: int = COLLECTION_CACHE_SIZE):
+        self.tables: LRUCache[SymbolTable] = LRUCache(cache_size)
+        chroma_repository.add_generation_listener(self.tables.pop)
+
+    def get_table(self, project: str = DEFAULT_PROJECT) -> SymbolTable:
+        # Drops the cached copy first if another process changed the project.
+        chroma_repository.get_generation(project)
+        name = chroma_repository.get_collection_name(project)
+        return self.tables.get_or_create(name, lambda: self.load(project))
+
+    def load(self, project: str = DEFAULT_PROJECT) -> SymbolTable:
+        name = chroma_repository.get_collection_name(project)
+        return SymbolTable(symbol_table_repository.load(name))
+
+    def begin_update(
+        self, project: str = DEFAULT_PROJECT, clear: bool = False
+    ) -> SymbolTable:
+        return SymbolTable() if clear else self.load(project)
+
+    def commit(self, project: str, table: SymbolTable) -> None:
+        name = chroma_repository.get_collection_name(project)
+        symbol_table_repository.save(name, table.files)
+        self.tables.put(name, table)
+
+
+symbol_table_service = SymbolTableService()
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from models.trace_model import QueryTrace, StageStats, TraceStats, TraceStep
+from utils.contants import TRACE_SAMPLE_SIZE
+
+current_trace: ContextVar[tuple[QueryTrace, float] | None] = ContextVar(
+    "current_trace", default=None
+)
+
+
+class TraceService:
+    """Times agent requests and the graph steps inside them.
+
+    A trace is bound to the current context, so nodes, tools and retrieval
+    (including tool calls run on ToolNode's worker threads, which copy the
+    context) attach their steps to the request that triggered them. Every step
+    is also folded into per-stage aggregates kept in memory.
+    """
+
+    def __init__(self, sample_size: int = TRACE_SAMPLE_SIZE):
+        self.sample_size = max(1, sample_size)
+        self.lock = threading.Lock()
+        self.durations: dict[str, deque[float]] = {}
+        self.totals: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def trace(self, question: str, project: str) -> Iterator[QueryTrace]:
+        query_trace = QueryTrace(question=question, project=project)
+        started = time.perf_counter()
+        token = current_trace.set((query_trace, started))
+        try:
+            yield query_trace
+        finally:
+            current_trace.reset(token)
+            query_trace.duration_ms = self.elapsed_ms(started)
+            self.aggregate("request:query", query_trace.duration_ms, {})
+
+    @contextmanager
+    def step(self, kind: str, name: str, **details) -> Iterator[TraceStep]:
+        """Time a block as one step. The yielded step's name and details can be
+        filled in by the caller before the block ends."""
+        trace_step = TraceStep(kind=kind, name=name, details=details)
+        started = time.perf_counter()
+        active = current_trace.get()
+        if active is not None:
+            trace_step.offset_ms = round((started - active[1]) * 1000, 2)
+
+        try:
+            yield trace_step
+        except Exception as e:
+            trace_step.details["error"] = str(e)
+            raise
+        finally:
+            trace_step.duration_ms = self.elapsed_ms(started)
+            if active is not None:
+                with self.lock:
+                    active[0].steps.append(trace_step)
+            self.aggregate(trace_step.stage, trace_step.duration_ms, trace_step.details)
+
+    def elapsed_ms(self, started: float) -> float:
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    def aggregate(self, stage: str, duration_ms: float, details: dict) -> None:
+        with self.lock:
+            durations = self.durations.get(stage)
+            if durations is None:
+                durations = self.durations[stage] = deque(maxlen=self.sample_size)
+                self.totals[stage] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                }
+
+            durations.append(duration_ms)
+            totals = self.totals[stage]
+            totals["count"] += 1
+            totals["total_ms"] += duration_ms
+            totals["max_ms"] = max(totals["max_ms"], duration_ms)
+            totals["prompt_tokens"] += details.get("prompt_tokens", 0)
+            totals["completion_tokens"] += details.get("completion_tokens", 0)
+
+    def percentile(self, ordered: list[float], fraction: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def get_stats(self) -> TraceStats:
+        with self.lock:
+            stages = []
+            for stage, totals in self.totals.items():
+                ordered = sorted(self.durations[stage])
+                stages.append(
+                    StageStats(
+                        stage=stage,
+                        count=int(totals["count"]),
+                        total_ms=totals["total_ms"],
+                        max_ms=totals["max_ms"],
+                        p50_ms=self.percentile(ordered, 0.5),
+                        p95_ms=self.percentile(ordered, 0.95),
+                        prompt_tokens=int(totals["prompt_tokens"]),
+                        completion_tokens=int(totals["completion_tokens"]),
+                    )
+                )
+
+        stages.sort(key=lambda stats: stats.total_ms, reverse=True)
+        return TraceStats(stages=stages)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.durations.clear()
+            self.totals.clear()
+
+
+trace_service = TraceService()
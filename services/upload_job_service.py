@@ -0,0 +1,183 @@
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO
+
+from werkzeug.datastructures import FileStorage
+
+from models.job_model import JobStatus, UploadJob
+from models.upload_model import UploadStatus
+from services.upload_service import upload_service
+from services.upload_source import (
+    ArchiveSource,
+    FileStorageSource,
+    GitSource,
+    UploadSource,
+)
+from utils.contants import UPLOAD_JOB_HISTORY, UPLOAD_JOB_QUEUE_SIZE, UPLOAD_JOB_WORKERS
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class UploadJobService:
+    SPOOL_MAX_MEMORY = 1024 * 1024
+
+    def __init__(
+        self,
+        workers: int = UPLOAD_JOB_WORKERS,
+        max_pending: int = UPLOAD_JOB_QUEUE_SIZE,
+        history: int = UPLOAD_JOB_HISTORY,
+    ):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="upload-job"
+        )
+        self.max_pending = max_pending
+        self.history = history
+        self.jobs: dict[str, UploadJob] = {}
+        self.futures: dict[str, Future] = {}
+        self.lock = threading.Lock()
+
+    def submit(
+        self, files: list[FileStorage], folder_name: str, full_reindex: bool = False
+    ) -> UploadJob:
+        # The request's file streams close once the response is sent, so copy
+        # them into spooled temp files the background worker can own.
+        source = FileStorageSource([self.spool_file(file) for file in files])
+        return self.enqueue(source, folder_name, full_reindex)
+
+    def submit_archive(
+        self,
+        stream: IO[bytes],
+        filename: str,
+        folder_name: str,
+        full_reindex: bool = False,
+    ) -> UploadJob:
+        """Queue an archive upload. Raises ArchiveError right away when the
+        stream is not a readable archive."""
+        source = ArchiveSource(self.spool_stream(stream), filename, close_stream=True)
+        return self.enqueue(source, folder_name, full_reindex)
+
+    def submit_git(
+        self,
+        repository_path: str,
+        folder_name: str,
+        ref: str = "HEAD",
+        full_reindex: bool = False,
+    ) -> UploadJob:
+        """Queue a git sync. The ref is resolved right away, so the job indexes
+        the commit that was current when it was submitted; raises
+        GitSourceError when that fails."""
+        source = GitSource(repository_path, ref)
+        return self.enqueue(source, folder_name, full_reindex)
+
+    def enqueue(
+        self, source: UploadSource, folder_name: str, full_reindex: bool
+    ) -> UploadJob:
+        with self.lock:
+            pending = sum(1 for job in self.jobs.values() if not job.is_finished)
+            if pending >= self.max_pending:
+                source.close()
+                raise JobQueueFullError(
+                    f"{pending} upload jobs are already queued or running"
+                )
+
+            job = UploadJob(
+                job_id=uuid.uuid4().hex,
+                folder_name=folder_name,
+                total_files=source.total_files or 0,
+            )
+            self.jobs[job.job_id] = job
+            self.prune_finished()
+
+            future = self.executor.submit(self.run, job, source, full_reindex)
+            # run() closes the source when it's done; a job cancelled while
+            # queued never runs, so its temp files are closed here instead.
+            future.add_done_callback(
+                lambda future: source.close() if future.cancelled() else None
+            )
+            self.futures[job.job_id] = future
+
+        return job
+
+    def spool_stream(self, stream: IO[bytes]) -> IO[bytes]:
+        spooled = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_MEMORY)
+        shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        return spooled
+
+    def spool_file(self, file: FileStorage) -> FileStorage:
+        return FileStorage(
+            stream=self.spool_stream(file.stream), filename=file.filename
+        )
+
+    def run(self, job: UploadJob, source: UploadSource, full_reindex: bool) -> None:
+        try:
+            if job.progress.cancel_requested:
+                job.status = JobStatus.CANCELLED
+                return
+
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+
+            job.result = upload_service.upload_source(
+                source, job.folder_name, full_reindex, progress=job.progress
+            )
+
+            if job.result.status == UploadStatus.CANCELLED:
+                job.status = JobStatus.CANCELLED
+            elif job.result.status == UploadStatus.FAILED:
+                job.status = JobStatus.FAILED
+            else:
+                job.status = JobStatus.SUCCEEDED
+
+        except Exception as e:
+            job.progress.errors.append(str(e))
+            job.status = JobStatus.FAILED
+
+        finally:
+            job.finished_at = time.time()
+            with self.lock:
+                self.futures.pop(job.job_id, None)
+            source.close()
+
+    def get(self, job_id: str) -> UploadJob | None:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> list[UploadJob]:
+        # Submits add and prune jobs on other request threads.
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> UploadJob | None:
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return job
+
+        job.progress.cancel_requested = True
+
+        with self.lock:
+            future = self.futures.get(job_id)
+            if future is not None and future.cancel():
+                # Never started, so run() won't record the outcome.
+                job.status = JobStatus.CANCELLED
+                job.finished_at = time.time()
+                self.futures.pop(job_id, None)
+
+        return job
+
+    def prune_finished(self) -> None:
+        finished = [job for job in self.jobs.values() if job.is_finished]
+        finished.sort(key=lambda job: job.finished_at or job.created_at)
+
+        for job in finished[: max(0, len(finished) - self.history)]:
+            del self.jobs[job.job_id]
+
+
+upload_job_service = UploadJobService()
@@ -1,8 +1,34 @@
+import hashlib
+import threading
+from typing import IO, Callable, Iterable, Iterator
+
 from werkzeug.datastructures import FileStorage
 
-from models.upload_model import UploadResponse, UploadStatus
+from models.code_chunk_model import CodeChunk
+from models.graph_model import FileEdges
+from models.symbol_model import Symbol
+from models.upload_model import (
+    IndexChanges,
+    UploadProgress,
+    UploadResponse,
+    UploadStatus,
+)
 from repositories.chroma_repository import chroma_repository
-from services.code_chunk_service import code_chunk_service
+from repositories.manifest_repository import manifest_repository
+from services.chunk_batcher import ChunkBatcher
+from services.code_graph_service import code_graph_service
+from services.lexical_index_service import lexical_index_service
+from services.symbol_table_service import symbol_table_service
+from services.parallel_chunk_service import parallel_chunk_service
+from services.spooled_file import SpooledFile
+from services.upload_source import (
+    ArchiveSource,
+    FileStorageSource,
+    GitSource,
+    SourceError,
+    UploadSource,
+)
+from utils.contants import LARGE_FILE_BYTES, MAX_FILE_BYTES
 
 SUPPORTED_EXTENSIONS = {
     ".py",
@@ -47,7 +73,18 @@ SUPPORTED_EXTENSIONS = {
 }
 
 
+class SkippedFileError(Exception):
+    pass
+
+
 class UploadService:
+    # Like git, treat a file as binary when a NUL byte appears this early.
+    BINARY_SNIFF_BYTES = 8000
+
+    def __init__(self):
+        self.locks: dict[str, threading.Lock] = {}
+        self.locks_guard = threading.Lock()
+
     def sanitize_path(self, path: str) -> str:
         return path.replace("..", "").lstrip("/").lstrip("\\")
 
@@ -63,52 +100,342 @@ class UploadService:
             "Makefile",
         }
 
-    def read_file_content(self, file: FileStorage) -> str | None:
+    def read_file(
+        self, size: int | None, open_entry: Callable[[], IO[bytes]]
+    ) -> str | SpooledFile:
+        """Read a file to index: its text when small, or a SpooledFile when
+        larger than LARGE_FILE_BYTES. Raises SkippedFileError for binary,
+        empty, oversized or unreadable files."""
+        if size is not None and size > MAX_FILE_BYTES:
+            raise SkippedFileError(f"larger than {MAX_FILE_BYTES} bytes")
+
+        try:
+            with open_entry() as stream:
+                head = stream.read(LARGE_FILE_BYTES + 1)
+                if b"\0" in head[: self.BINARY_SNIFF_BYTES]:
+                    raise SkippedFileError("binary")
+
+                if len(head) > LARGE_FILE_BYTES:
+                    return self.spool_file(head, stream)
+
+                content = head.decode("utf-8", errors="ignore")
+        except SkippedFileError:
+            raise
+        except Exception as e:
+            raise SkippedFileError("empty or unreadable") from e
+
+        if not content.strip():
+            raise SkippedFileError("empty or unreadable")
+        return content
+
+    def spool_file(self, head: bytes, stream: IO[bytes]) -> SpooledFile:
+        spooled = SpooledFile()
+        try:
+            spooled.write(head)
+            while block := stream.read(SpooledFile.BLOCK_SIZE):
+                spooled.write(block)
+                # The size of a raw request part isn't known up front.
+                if spooled.size > MAX_FILE_BYTES:
+                    raise SkippedFileError(f"larger than {MAX_FILE_BYTES} bytes")
+
+            if spooled.is_blank():
+                raise SkippedFileError("empty or unreadable")
+        except BaseException:
+            spooled.close()
+            raise
+        return spooled
+
+    def iter_readable_files(
+        self,
+        source: UploadSource,
+        listed_files: set[str],
+        skipped_files: list[str],
+        source_errors: list[str],
+        progress: UploadProgress,
+    ) -> Iterator[tuple[str, str | SpooledFile]]:
+        """Yield the supported, non-empty text files of ``source``. Every path
+        the source lists, skipped or not, is added to ``listed_files``. A source
+        that breaks part way through (a truncated archive) ends the iteration
+        and is recorded in ``source_errors``."""
         try:
-            content = file.read()
-            file.seek(0)
-            return content.decode("utf-8", errors="ignore")
-        except Exception:
-            return None
+            for name, size, open_entry in source.iter_entries():
+                if progress.cancel_requested:
+                    return
+
+                relative_path = self.sanitize_path(name)
+                listed_files.add(relative_path)
+
+                if not self.is_supported_file(relative_path):
+                    skipped_files.append(relative_path)
+                    progress.files_processed += 1
+                    continue
+
+                try:
+                    content = self.read_file(size, open_entry)
+                except SkippedFileError as e:
+                    skipped_files.append(f"{relative_path} ({e})")
+                    progress.files_processed += 1
+                    continue
+
+                yield relative_path, content
+
+        except SourceError as e:
+            source_errors.append(str(e))
+
+    def iter_changed_files(
+        self,
+        readable_files: Iterator[tuple[str, str | SpooledFile]],
+        previous_manifest: dict[str, str],
+        file_hashes: dict[str, str],
+        progress: UploadProgress,
+    ) -> Iterator[tuple[str, str | SpooledFile]]:
+        """Record every file's content hash and yield only added or changed files."""
+        for relative_path, content in readable_files:
+            if isinstance(content, SpooledFile):
+                digest = content.digest
+            else:
+                digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            file_hashes[relative_path] = digest
+
+            if previous_manifest.get(relative_path) != digest:
+                yield relative_path, content
+            else:
+                progress.files_processed += 1
+                if isinstance(content, SpooledFile):
+                    content.close()
 
     def upload_folder(
-        self, files: list[FileStorage], folder_name: str
+        self,
+        files: list[FileStorage],
+        folder_name: str,
+        full_reindex: bool = False,
+        progress: UploadProgress | None = None,
+    ) -> UploadResponse:
+        return self.upload_source(
+            FileStorageSource(files), folder_name, full_reindex, progress
+        )
+
+    def upload_archive(
+        self,
+        stream: IO[bytes],
+        filename: str,
+        folder_name: str,
+        full_reindex: bool = False,
+        progress: UploadProgress | None = None,
+    ) -> UploadResponse:
+        """Index the members of a zip or tar archive as if they were uploaded as
+        a folder. Raises ArchiveError when the stream is not a readable archive."""
+        source = ArchiveSource(stream, filename)
+        try:
+            return self.upload_source(source, folder_name, full_reindex, progress)
+        finally:
+            source.close()
+
+    def sync_git(
+        self,
+        repository_path: str,
+        folder_name: str,
+        ref: str = "HEAD",
+        full_reindex: bool = False,
+        progress: UploadProgress | None = None,
+    ) -> UploadResponse:
+        """Index ``ref`` of a local git repository. After the first sync only the
+        files changed since the last synced commit are read and re-chunked.
+        Raises GitSourceError when the path or ref can't be resolved."""
+        source = GitSource(repository_path, ref)
+        try:
+            return self.upload_source(source, folder_name, full_reindex, progress)
+        finally:
+            source.close()
+
+    def upload_source(
+        self,
+        source: UploadSource,
+        folder_name: str,
+        full_reindex: bool = False,
+        progress: UploadProgress | None = None,
+    ) -> UploadResponse:
+        # Each folder is indexed as its own project collection. Uploads into the
+        # same collection must not interleave: each one reads and rewrites the
+        # collection's manifest.
+        project = folder_name
+        collection_name = chroma_repository.get_collection_name(project)
+
+        with self.locks_guard:
+            lock = self.locks.setdefault(collection_name, threading.Lock())
+
+        with lock:
+            try:
+                return self.index_files(
+                    source, project, full_reindex, progress or UploadProgress()
+                )
+            finally:
+                # Even a failed or cancelled upload may have written chunks.
+                chroma_repository.bump_generation(project)
+
+    def index_files(
+        self,
+        source: UploadSource,
+        project: str,
+        full_reindex: bool,
+        progress: UploadProgress,
     ) -> UploadResponse:
+        collection_name = chroma_repository.get_collection_name(project)
         uploaded_files: list[str] = []
         failed_files: list[str] = []
         skipped_files: list[str] = []
+        source_errors: list[str] = []
 
-        chroma_repository.clear_collection()
+        previous_manifest = (
+            {} if full_reindex else manifest_repository.load(collection_name)
+        )
+        if not previous_manifest:
+            chroma_repository.clear_collection(project)
 
-        for file in files:
-            if not file.filename:
-                continue
+        source.set_indexed_commit(
+            manifest_repository.load_commit(collection_name)
+            if previous_manifest
+            else None
+        )
+        is_delta = source.deleted_files is not None
+        progress.total_files = source.total_files
+
+        file_hashes: dict[str, str] = {}
+        reindexed_files: list[str] = []
+        unchunked_files: set[str] = set()
+        lexical_index = lexical_index_service.begin_update(
+            project, clear=not previous_manifest
+        )
+        symbol_table = symbol_table_service.begin_update(
+            project, clear=not previous_manifest
+        )
+        file_symbols: dict[str, list[Symbol]] = {}
+        code_graph = code_graph_service.begin_update(
+            project, clear=not previous_manifest
+        )
+        file_edges: dict[str, FileEdges] = {}
+        batcher = ChunkBatcher(project, lexical_index=lexical_index)
+
+        listed_files: set[str] = set()
+        readable_files = self.iter_readable_files(
+            source, listed_files, skipped_files, source_errors, progress
+        )
+        changed_files = self.iter_changed_files(
+            readable_files, previous_manifest, file_hashes, progress
+        )
 
-            relative_path = self.sanitize_path(file.filename)
+        for relative_path, result in parallel_chunk_service.chunk_files(changed_files):
+            progress.files_processed += 1
+            progress.chunks_written = batcher.chunks_written
 
-            if not self.is_supported_file(relative_path):
-                skipped_files.append(relative_path)
+            if isinstance(result, Exception):
+                unchunked_files.add(relative_path)
+                failed_files.append(f"{relative_path}: {str(result)}")
+                progress.errors.append(failed_files[-1])
                 continue
 
+            chunks, edges = result
             try:
-                content = self.read_file_content(file)
-                if content is None or not content.strip():
-                    skipped_files.append(f"{relative_path} (empty or unreadable)")
-                    continue
-
-                file_id = f"{relative_path}".replace("/", "_").replace("\\", "_")
+                if relative_path in previous_manifest:
+                    batcher.replace_file(relative_path)
 
-                self.chunk_file(
-                    file_id=file_id,
-                    content=content,
+                file_symbols[relative_path] = self.add_file_chunks(
                     file_path=relative_path,
+                    chunks=chunks,
+                    batcher=batcher,
                 )
-                uploaded_files.append(relative_path)
+                file_edges[relative_path] = edges
+                reindexed_files.append(relative_path)
 
             except Exception as e:
+                unchunked_files.add(relative_path)
                 failed_files.append(f"{relative_path}: {str(e)}")
+                progress.errors.append(failed_files[-1])
+
+        failed_files.extend(source_errors)
+        progress.errors.extend(source_errors)
+
+        # A cancelled upload, or one whose source broke off, never saw the
+        # remaining files, so they can't be treated as removed.
+        cancelled = progress.cancel_requested
+        incomplete = cancelled or bool(source_errors)
+        if incomplete:
+            removed_files = []
+        elif is_delta:
+            # Only touched files were listed; the rest are unchanged. A listed
+            # file that is now skipped (emptied, binary, too large) is removed
+            # as it would be from a folder upload.
+            deleted_files = {self.sanitize_path(path) for path in source.deleted_files}
+            removed_files = sorted(
+                (deleted_files | listed_files)
+                & (set(previous_manifest) - set(file_hashes))
+            )
+        else:
+            removed_files = sorted(set(previous_manifest) - set(file_hashes))
+        for relative_path in removed_files:
+            batcher.replace_file(relative_path)
+
+        batcher.flush()
+        lexical_index_service.commit(project, lexical_index)
+
+        for relative_path in removed_files:
+            if relative_path not in batcher.failed_files:
+                symbol_table.remove_file(relative_path)
+                code_graph.remove_file(relative_path)
+        for relative_path, symbols in file_symbols.items():
+            if relative_path in batcher.failed_files:
+                symbol_table.remove_file(relative_path)
+                code_graph.remove_file(relative_path)
+            else:
+                symbol_table.replace_file(relative_path, symbols)
+                code_graph.replace_file(relative_path, file_edges[relative_path])
+        symbol_table_service.commit(project, symbol_table)
+        code_graph_service.commit(project, code_graph)
+        progress.chunks_written = batcher.chunks_written
+
+        if batcher.failed_files:
+            reindexed_files = [
+                path for path in reindexed_files if path not in batcher.failed_files
+            ]
+            failed_files.extend(
+                f"{path}: {error}" for path, error in batcher.failed_files.items()
+            )
+            progress.errors.extend(
+                f"{path}: {error}" for path, error in batcher.failed_files.items()
+            )
+
+        manifest = self.build_manifest(
+            previous_manifest,
+            file_hashes,
+            unchunked_files,
+            batcher.failed_files,
+            keep_unseen=incomplete or is_delta,
+            removed_files=set(removed_files),
+        )
+        # The next sync only re-reads files changed since this commit, so it is
+        # recorded only when every file of it made it into the index.
+        indexed_commit = None if incomplete or failed_files else source.commit
+        manifest_repository.save(collection_name, manifest, indexed_commit)
+
+        reindexed = set(reindexed_files)
+        uploaded_files = [
+            path
+            for path in file_hashes
+            if path in reindexed or previous_manifest.get(path) == file_hashes[path]
+        ]
+        changes = IndexChanges(
+            added=sum(1 for path in reindexed_files if path not in previous_manifest),
+            changed=sum(1 for path in reindexed_files if path in previous_manifest),
+            unchanged=len(uploaded_files) - len(reindexed_files),
+            deleted=len(
+                [path for path in removed_files if path not in batcher.failed_files]
+            ),
+        )
 
-        if not uploaded_files and failed_files:
+        if cancelled:
+            status = UploadStatus.CANCELLED
+            message = f"Upload cancelled after indexing {len(reindexed_files)} files"
+        elif not uploaded_files and failed_files:
             status = UploadStatus.FAILED
             message = "All files failed to process"
         elif failed_files:
@@ -116,9 +443,13 @@ class UploadService:
             message = f"Indexed {len(uploaded_files)} files, {len(failed_files)} failed, {len(skipped_files)} skipped"
         else:
             status = UploadStatus.SUCCESS
-            message = f"Successfully indexed {len(uploaded_files)} files into ChromaDB"
+            message = (
+                f"Successfully indexed {len(uploaded_files)} files into ChromaDB "
+                f"({changes.added} added, {changes.changed} changed, "
+                f"{changes.unchanged} unchanged, {changes.deleted} deleted)"
+            )
 
-        stats = chroma_repository.get_stats()
+        stats = chroma_repository.get_stats(project)
 
         return UploadResponse(
             status=status,
@@ -126,27 +457,69 @@ class UploadService:
             uploaded_files=uploaded_files,
             failed_files=failed_files,
             destination_path=f"ChromaDB collection: {stats.collection_name} ({stats.total_documents} chunks)",
+            total_chunks=batcher.chunks_written,
+            batches=batcher.reports,
+            changes=changes,
+            commit=source.commit,
         )
 
-    def chunk_file(
+    def build_manifest(
+        self,
+        previous_manifest: dict[str, str],
+        file_hashes: dict[str, str],
+        unchunked_files: set[str],
+        failed_writes: dict[str, str],
+        keep_unseen: bool = False,
+        removed_files: set[str] = frozenset(),
+    ) -> dict[str, str]:
+        manifest: dict[str, str] = {}
+
+        for relative_path, digest in file_hashes.items():
+            if relative_path in failed_writes:
+                # Its chunks may be half replaced; leave it out so the next
+                # upload re-indexes it from scratch.
+                continue
+            if relative_path in unchunked_files:
+                # Chunking failed before anything was written, so the previous
+                # chunks (if any) are still the indexed version.
+                if relative_path in previous_manifest:
+                    manifest[relative_path] = previous_manifest[relative_path]
+                continue
+            manifest[relative_path] = digest
+
+        for relative_path, digest in previous_manifest.items():
+            if relative_path in file_hashes:
+                continue
+            if relative_path in failed_writes or (
+                keep_unseen and relative_path not in removed_files
+            ):
+                # A removed file whose chunks could not be deleted yet, or one
+                # not reached before cancellation or not listed by a git diff.
+                manifest[relative_path] = digest
+
+        return manifest
+
+    def add_file_chunks(
         self,
-        file_id: str,
-        content: str,
         file_path: str,
-    ) -> int:
-        chunks = code_chunk_service.chunk_code(content, file_path)
+        chunks: Iterable[CodeChunk],
+        batcher: ChunkBatcher,
+    ) -> list[Symbol]:
+        """Queue the file's chunks for writing and return the symbols they
+        define. ``chunks`` may be a generator, consumed once."""
+        file_id = file_path.replace("/", "_").replace("\\", "_")
+        symbols: list[Symbol] = []
 
         for i, chunk in enumerate(chunks):
             chunk_id = f"{file_id}_{chunk.chunk_type}_{chunk.name}_{i}"
             chunk_id = chunk_id.replace(" ", "_").replace("/", "_")
 
-            chroma_repository.add(
-                ids=[chunk_id],
-                documents=[chunk.to_document()],
-                metadatas=[chunk.to_metadata()],
-            )
+            for symbol in chunk.symbols:
+                symbol.chunk_id = chunk_id
+            symbols.extend(chunk.symbols)
+            batcher.add(chunk_id, chunk)
 
-        return len(chunks)
+        return symbols
 
 
 upload_service = UploadService()
@@ -0,0 +1,372 @@
+import io
+import os
+import posixpath
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import zipfile
+from abc import ABC, abstractmethod
+from typing import IO, Callable, Iterator
+
+from werkzeug.datastructures import FileStorage
+
+# A file's name in its source, its size in bytes when known, and a function
+# opening its content as a binary stream. The stream must be read and closed
+# before the next entry is requested.
+SourceEntry = tuple[str, int | None, Callable[[], IO[bytes]]]
+
+
+class SourceError(Exception):
+    pass
+
+
+class ArchiveError(SourceError):
+    pass
+
+
+class GitSourceError(SourceError):
+    pass
+
+
+class UploadSource(ABC):
+    """Where an upload's files come from.
+
+    Entries are produced one at a time and opened only on demand, so indexing
+    holds at most the files currently being chunked in memory, never the whole
+    upload.
+    """
+
+    # How many entries the source has, when that is known up front.
+    total_files: int | None = None
+    # The git commit the entries were read from.
+    commit: str | None = None
+    # Set by sources that list only the files changed since the indexed
+    # version: the files deleted since. Files such a source doesn't list are
+    # left as they are rather than treated as removed.
+    deleted_files: list[str] | None = None
+
+    def set_indexed_commit(self, commit: str | None) -> None:
+        """Called before iteration with the commit the collection was last
+        fully indexed at, if any."""
+
+    @abstractmethod
+    def iter_entries(self) -> Iterator[SourceEntry]:
+        """Yield the source's files. Raises SourceError if the source turns out
+        to be unreadable part way through."""
+
+    def close(self) -> None:
+        pass
+
+
+class FileStorageSource(UploadSource):
+    """Files from a multipart request."""
+
+    def __init__(self, files: list[FileStorage]):
+        self.files = files
+        self.total_files = len(files)
+
+    def iter_entries(self) -> Iterator[SourceEntry]:
+        for file in self.files:
+            if file.filename:
+                yield file.filename, self.get_size(file), lambda file=file: (
+                    self.open(file)
+                )
+
+    def get_size(self, file: FileStorage) -> int | None:
+        try:
+            file.stream.seek(0, os.SEEK_END)
+            size = file.stream.tell()
+            file.stream.seek(0)
+        except (AttributeError, OSError):
+            return None
+        return size
+
+    def open(self, file: FileStorage) -> IO[bytes]:
+        file.stream.seek(0)
+        return file.stream
+
+    def close(self) -> None:
+        for file in self.files:
+            file.close()
+
+
+class ArchiveSource(UploadSource):
+    """Members of a zip or tar archive (optionally gzip, bzip2 or xz compressed).
+
+    Tar archives are read strictly in order, so they can come straight from a
+    request body. Zip archives keep their directory at the end and need a
+    seekable stream; anything else is first spooled to a temporary file.
+    """
+
+    SPOOL_MAX_MEMORY = 1024 * 1024
+    ZIP_MAGIC = (b"PK\x03\x04", b"PK\x05\x06")
+    COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ")
+    TAR_MAGIC_OFFSET = 257
+    ZIP_SUFFIXES = (".zip",)
+    TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+    def __init__(
+        self, stream: IO[bytes], filename: str = "", close_stream: bool = False
+    ):
+        self.stream = stream
+        # The caller's stream is closed with the source only when it is handed
+        # over; a spooled copy always is.
+        self.owned_stream = stream if close_stream else None
+        self.spooled: IO[bytes] | None = None
+        self.zip_file: zipfile.ZipFile | None = None
+
+        try:
+            self.open(filename.lower())
+        except ArchiveError:
+            self.close()
+            raise
+
+    def open(self, filename: str) -> None:
+        if self.detect_format(filename) != "zip":
+            return
+
+        if not self.is_seekable(self.stream):
+            self.spooled = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_MEMORY)
+            shutil.copyfileobj(self.stream, self.spooled)
+            self.spooled.seek(0)
+            self.stream = self.spooled
+        try:
+            self.zip_file = zipfile.ZipFile(self.stream)
+        except (zipfile.BadZipFile, OSError) as e:
+            raise ArchiveError(f"Invalid zip archive: {e}") from e
+        self.total_files = sum(
+            1 for info in self.zip_file.infolist() if not info.is_dir()
+        )
+
+    def is_seekable(self, stream: IO[bytes]) -> bool:
+        try:
+            return stream.seekable()
+        except (AttributeError, OSError):
+            return False
+
+    def detect_format(self, filename: str) -> str:
+        if self.is_seekable(self.stream):
+            position = self.stream.tell()
+            header = self.stream.read(self.TAR_MAGIC_OFFSET + 5)
+            self.stream.seek(position)
+
+            if header.startswith(self.ZIP_MAGIC):
+                return "zip"
+            if header.startswith(self.COMPRESSED_MAGIC) or (
+                header[self.TAR_MAGIC_OFFSET :] == b"ustar"
+            ):
+                return "tar"
+        elif filename.endswith(self.ZIP_SUFFIXES):
+            return "zip"
+        elif filename.endswith(self.TAR_SUFFIXES):
+            return "tar"
+
+        raise ArchiveError(
+            "Unsupported archive format, expected a zip or (compressed) tar archive"
+        )
+
+    def iter_entries(self) -> Iterator[SourceEntry]:
+        try:
+            if self.zip_file is not None:
+                yield from self.iter_zip(self.zip_file)
+            else:
+                yield from self.iter_tar()
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+            raise ArchiveError(f"Could not read archive: {e}") from e
+
+    def iter_zip(self, archive: zipfile.ZipFile) -> Iterator[SourceEntry]:
+        for info in archive.infolist():
+            if not info.is_dir():
+                name = self.normalize_name(info.filename)
+                yield name, info.file_size, lambda info=info: archive.open(info)
+
+    def iter_tar(self) -> Iterator[SourceEntry]:
+        # "r|*" streams the members in order without seeking, decompressing
+        # whatever compression the archive uses.
+        with tarfile.open(fileobj=self.stream, mode="r|*") as archive:
+            for member in archive:
+                # Links, devices and directories carry no content to index.
+                if member.isfile():
+                    name = self.normalize_name(member.name)
+                    yield name, member.size, lambda member=member: (
+                        archive.extractfile(member)
+                    )
+
+    def normalize_name(self, name: str) -> str:
+        # "./src/app.py" and "src/app.py" must index as the same file, and
+        # "../../app.py" must not index outside the project root.
+        parts = posixpath.normpath(name.replace("\\", "/")).split("/")
+        return "/".join(part for part in parts if part not in ("", ".", ".."))
+
+    def close(self) -> None:
+        if self.zip_file is not None:
+            self.zip_file.close()
+        if self.spooled is not None:
+            self.spooled.close()
+        if self.owned_stream is not None:
+            self.owned_stream.close()
+
+
+class GitSource(UploadSource):
+    """Files of one commit of a local git repository, a working tree or a bare
+    repository. Nothing is fetched.
+
+    Only tracked files are listed, so whatever ``.gitignore`` excludes never
+    shows up. Once the collection has been indexed at an earlier commit, only
+    the paths ``git diff`` reports between the two commits are listed.
+    """
+
+    SYMLINK_MODE = "120000"
+
+    def __init__(self, repository_path: str, ref: str = "HEAD"):
+        self.repository_path = os.path.realpath(repository_path)
+        if not os.path.isdir(self.repository_path):
+            raise GitSourceError(f"Not a directory: {repository_path}")
+
+        self.commit = self.run_git("rev-parse", "--verify", f"{ref}^{{commit}}")
+        self.commit = self.commit.strip()
+        self.base_commit: str | None = None
+        self.blobs = self.list_blobs()
+        self.total_files = len(self.blobs)
+
+    def get_env(self) -> dict[str, str]:
+        # Inherited GIT_DIR and friends would point git at another repository.
+        env = {key: value for key, value in os.environ.items() if key[:4] != "GIT_"}
+        # Never look for a repository above the given path, never prompt, and
+        # don't refresh the index of a working tree.
+        env["GIT_CEILING_DIRECTORIES"] = os.path.dirname(self.repository_path)
+        env["GIT_TERMINAL_PROMPT"] = "0"
+        env["GIT_OPTIONAL_LOCKS"] = "0"
+        return env
+
+    def git_command(self, *args: str) -> list[str]:
+        return ["git", "-C", self.repository_path, *args]
+
+    def run_git(self, *args: str) -> str:
+        try:
+            result = subprocess.run(
+                self.git_command(*args),
+                capture_output=True,
+                check=True,
+                env=self.get_env(),
+            )
+        except FileNotFoundError as e:
+            raise GitSourceError("git is not installed") from e
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.decode("utf-8", errors="replace").strip()
+            raise GitSourceError(f"git {args[0]} failed: {error}") from e
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def split_records(self, output: str) -> list[str]:
+        return [record for record in output.split("\0") if record]
+
+    def list_blobs(self) -> dict[str, tuple[str, int]]:
+        """Path to blob id and size of every regular file in the commit.
+        Submodules and symlinks have no content of their own to index."""
+        blobs = {}
+        for record in self.split_records(
+            self.run_git("ls-tree", "-r", "-l", "-z", self.commit)
+        ):
+            info, _, path = record.partition("\t")
+            mode, object_type, object_id, size = info.split()
+            if object_type == "blob" and mode != self.SYMLINK_MODE:
+                blobs[path] = (object_id, int(size))
+        return blobs
+
+    def has_commit(self, commit: str) -> bool:
+        try:
+            self.run_git("cat-file", "-e", f"{commit}^{{commit}}")
+        except GitSourceError:
+            return False
+        return True
+
+    def set_indexed_commit(self, commit: str | None) -> None:
+        # A commit the repository doesn't know (history rewritten, or another
+        # repository indexed into the same project) can't be diffed against;
+        # every file is listed and unchanged ones are skipped by their hash.
+        if not commit or not self.has_commit(commit):
+            return
+
+        output = self.run_git(
+            "diff", "--name-status", "--no-renames", "-z", commit, self.commit
+        )
+        records = self.split_records(output)
+        touched = set(records[1::2])
+
+        self.base_commit = commit
+        self.blobs = {
+            path: blob for path, blob in self.blobs.items() if path in touched
+        }
+        # Deleted paths, and paths that became a symlink or submodule.
+        self.deleted_files = sorted(touched - set(self.blobs))
+        self.total_files = len(self.blobs)
+
+    def iter_entries(self) -> Iterator[SourceEntry]:
+        # One long-running "cat-file --batch" reads every blob, instead of a
+        # git process per file.
+        try:
+            process = subprocess.Popen(
+                self.git_command("cat-file", "--batch"),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                env=self.get_env(),
+            )
+        except FileNotFoundError as e:
+            raise GitSourceError("git is not installed") from e
+
+        try:
+            for path, (object_id, size) in self.blobs.items():
+                yield path, size, lambda object_id=object_id: self.open_blob(
+                    process, object_id
+                )
+        finally:
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
+
+    def open_blob(self, process: subprocess.Popen, object_id: str) -> IO[bytes]:
+        process.stdin.write(f"{object_id}\n".encode("ascii"))
+        process.stdin.flush()
+
+        header = process.stdout.readline().split()
+        if len(header) != 3 or header[1] != b"blob":
+            raise GitSourceError(f"Could not read blob {object_id}")
+
+        # Every object is followed by a newline.
+        return io.BufferedReader(
+            BoundedReader(process.stdout, int(header[2]), trailer=1)
+        )
+
+
+class BoundedReader(io.RawIOBase):
+    """The next ``size`` bytes of a shared stream. Closing it skips whatever
+    was not read, plus ``trailer`` separator bytes, so the stream is left at
+    the start of the next object."""
+
+    SKIP_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, stream: IO[bytes], size: int, trailer: int = 0):
+        self.stream = stream
+        self.remaining = size
+        self.trailer = trailer
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.stream.read(min(len(buffer), self.remaining))
+        buffer[: len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            while self.remaining:
+                skipped = self.stream.read(min(self.remaining, self.SKIP_BLOCK_SIZE))
+                if not skipped:
+                    break
+                self.remaining -= len(skipped)
+            self.stream.read(self.trailer)
+        super().close()
@@ -1 +1,78 @@
+import os
+
 LLM_MODEL = "openai/gpt-oss-120b"
+
+# Bulk ingestion: chunks are buffered across files and written to Chroma in
+# batches capped by both chunk count and total document bytes.
+UPLOAD_BATCH_MAX_CHUNKS = int(os.getenv("UPLOAD_BATCH_MAX_CHUNKS", "256"))
+UPLOAD_BATCH_MAX_BYTES = int(os.getenv("UPLOAD_BATCH_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# Folder uploads parse and chunk files on a process pool of this many workers.
+# A value of 1 chunks inline on the request thread.
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 1)))
+
+# Estimated tokens per chunk. Larger classes are split into a signature skeleton
+# plus one chunk per method, and larger functions between statements.
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "800"))
+
+# Uploaded files above LARGE_FILE_BYTES are spooled to disk and split into
+# plain line chunks without parsing, never held whole in memory; files above
+# MAX_FILE_BYTES are skipped.
+LARGE_FILE_BYTES = int(os.getenv("LARGE_FILE_BYTES", str(2 * 1024 * 1024)))
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", str(64 * 1024 * 1024)))
+
+# Asynchronous upload jobs: how many run at once, how many may be queued or
+# running before new submissions are rejected, and how many finished jobs are
+# kept for polling.
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_QUEUE_SIZE = int(os.getenv("UPLOAD_JOB_QUEUE_SIZE", "8"))
+UPLOAD_JOB_HISTORY = int(os.getenv("UPLOAD_JOB_HISTORY", "100"))
+
+# Local git repositories may be synced through the API only when they lie under
+# one of these directories (separated by os.pathsep). Empty disables git syncs.
+GIT_REPOSITORY_ROOTS = [
+    os.path.realpath(root)
+    for root in os.getenv("GIT_REPOSITORY_ROOTS", "").split(os.pathsep)
+    if root
+]
+
+# "writer" serves uploads and queries from a single process. "query" serves
+# queries only and never writes, so any number of query workers can share the
+# index a writer maintains.
+SERVER_ROLES = ("writer", "query")
+SERVER_ROLE = os.getenv("SERVER_ROLE", "writer")
+
+# Production serving (gunicorn.conf.py): the address to bind, query worker
+# processes (the writer always runs one) and request threads per worker.
+WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:5000")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+WEB_THREADS = int(os.getenv("WEB_THREADS", "4"))
+
+# Each uploaded project gets its own Chroma collection. Uploads and queries that
+# don't name a project use the default one.
+DEFAULT_PROJECT = "codebase_explainer"
+COLLECTION_CACHE_SIZE = int(os.getenv("COLLECTION_CACHE_SIZE", "32"))
+
+# Agent retrieval results are cached per project and index generation.
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "600"))
+
+# Agent searches rank chunks by embedding similarity ("vector"), by BM25 over
+# identifiers ("lexical"), or by fusing both ("hybrid").
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+# Tool calls requested in one agent turn run in parallel, at most this many at
+# a time.
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+
+# Estimated prompt tokens the agent may send per LLM call. Above it, chunks in
+# older tool results are reduced to their file and line references.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+
+# Identifies the model behind cached document embeddings; change it whenever the
+# embedding function changes so stale vectors are never reused.
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID", "chroma-default-all-MiniLM-L6-v2")
+
+# Agent instrumentation keeps this many recent durations per stage for the
+# latency percentiles reported by /api/query/stats.
+TRACE_SAMPLE_SIZE = int(os.getenv("TRACE_SAMPLE_SIZE", "1000"))
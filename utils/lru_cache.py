@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe bounded mapping that evicts the least recently used entry.
+
+    Entries optionally expire ``ttl_seconds`` after they were stored. Lookups are
+    counted so callers can report hit rates.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict[Hashable, tuple[V, float]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> V | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl_seconds is not None:
+                if time.monotonic() - entry[1] > self.ttl_seconds:
+                    del self.entries[key]
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: V) -> None:
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], V]) -> V:
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> V | None:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            return entry[0] if entry is not None else None
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,10 @@
+"""WSGI entry point for production serving:
+
+    gunicorn wsgi:app
+
+Settings are read from gunicorn.conf.py.
+"""
+
+from main import create_app
+
+app = create_app()